@@ -0,0 +1,567 @@
+# Substitutos locais da planilha do Google, para testes de carga e uso sem internet.
+#
+# Implementam o subconjunto da API do gspread usado pelo aplicativo do aluno e pelo
+# dashboard (abas como listas de linhas de texto), então o restante do código não
+# muda. Os dois importam este mesmo arquivo: app.py, cliente_planilha.py e
+# teste_carga.py acrescentam a pasta compartilhado/ ao sys.path.
+#
+# Seleção por variáveis de ambiente:
+#   STORAGE_BACKEND=sheets (padrão) | sqlite | memory
+#   STORAGE_SQLITE_PATH=planilha_local.sqlite3   arquivo usado pelo backend sqlite
+#   STORAGE_LATENCY_MS=0                        atraso simulado por requisição
+#   STORAGE_LATENCY_JITTER_MS=0                 variação aleatória somada ao atraso
+#
+# Uso para preparar uma planilha SQLite a partir de CSVs (a primeira aba criada é a
+# lista de contas, lida pelo aplicativo do aluno como sheet1):
+#   python compartilhado/planilha_local.py --sqlite planilha_local.sqlite3 --importar Contas contas.csv
+import os
+import csv
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, absolute_range_name, numericise_all, rowcol_to_a1
+
+BACKEND_ARMAZENAMENTO = (os.getenv("STORAGE_BACKEND") or "sheets").lower()
+CAMINHO_SQLITE = os.getenv("STORAGE_SQLITE_PATH") or "planilha_local.sqlite3"
+LATENCIA_MS = float(os.getenv("STORAGE_LATENCY_MS") or 0)
+VARIACAO_LATENCIA_MS = float(os.getenv("STORAGE_LATENCY_JITTER_MS") or 0)
+
+
+# Horário de uma escrita no formato do modifiedTime do Drive (com microssegundos)
+def _agora():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+# Separa "'Aba'!A1:B2" em ("Aba", "A1:B2"); sem faixa, retorna ("Aba", None)
+def separar_faixa(faixa):
+    if "!" in faixa:
+        titulo, celulas = faixa.rsplit("!", 1)
+    else:
+        titulo, celulas = faixa, None
+    if titulo.startswith("'") and titulo.endswith("'"):
+        titulo = titulo[1:-1].replace("''", "'")
+    return titulo, celulas
+
+
+# Tamanho de uma aba nova quando add_worksheet não o informa (como no gspread)
+LINHAS_PADRAO = 1000
+COLUNAS_PADRAO = 26
+
+
+# A API omite as células vazias no fim de cada linha e as linhas vazias no fim da faixa
+def _aparar(linhas):
+    linhas = [list(linha) for linha in linhas]
+    for linha in linhas:
+        while linha and linha[-1] == "":
+            linha.pop()
+    while linhas and not linhas[-1]:
+        linhas.pop()
+    return linhas
+
+
+# Linhas em colunas, omitindo as células vazias do fim de cada coluna (como a API)
+def _transpor(linhas):
+    largura = max((len(linha) for linha in linhas), default=0)
+    colunas = [[linha[i] if i < len(linha) else "" for linha in linhas] for i in range(largura)]
+    return _aparar(colunas)
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor)
+
+
+# Base das planilhas locais. As subclasses guardam as abas; aqui ficam a interpretação
+# das faixas A1 e a latência simulada, aplicada uma vez por requisição (como cada
+# chamada à API do Google). Cada aba tem uma grade de linhas e colunas, como no Google
+# Sheets: uma escrita fora dela é recusada, e um anexo só acrescenta linhas.
+class PlanilhaLocal(ABC):
+    def __init__(self, identificador, latencia_ms=LATENCIA_MS, variacao_ms=VARIACAO_LATENCIA_MS):
+        self.id = identificador
+        self.title = identificador
+        self.latencia_ms = latencia_ms
+        self.variacao_ms = variacao_ms
+
+    def _requisicao(self):
+        atraso = self.latencia_ms + random.uniform(0, self.variacao_ms)
+        if atraso > 0:
+            time.sleep(atraso / 1000)
+
+    # --- Armazenamento (implementado pelas subclasses) ---
+
+    @abstractmethod
+    def _titulos(self):
+        pass
+
+    @abstractmethod
+    def _criar(self, titulo, linhas, colunas):
+        pass
+
+    @abstractmethod
+    def _ler(self, titulo):
+        pass
+
+    # (linhas, colunas) da grade da aba
+    @abstractmethod
+    def _tamanho(self, titulo):
+        pass
+
+    # Muda a grade da aba (None mantém a dimensão); o que ficar fora dela é apagado
+    @abstractmethod
+    def _redimensionar(self, titulo, linhas, colunas):
+        pass
+
+    # Retorna a posição (a partir de 0) da primeira linha anexada; a grade ganha as
+    # linhas que faltarem
+    @abstractmethod
+    def _anexar(self, titulo, linhas):
+        pass
+
+    @abstractmethod
+    def _escrever(self, titulo, linha_inicial, coluna_inicial, valores):
+        pass
+
+    # Apaga as linhas [inicio, fim), que também saem da grade
+    @abstractmethod
+    def _apagar(self, titulo, inicio, fim):
+        pass
+
+    @abstractmethod
+    def _modificado(self):
+        pass
+
+    # --- Interface do gspread.Spreadsheet ---
+
+    # Horário da última escrita em qualquer aba, como o modifiedTime do Drive
+    @property
+    def lastUpdateTime(self):
+        self._requisicao()
+        return self._modificado()
+
+    def worksheets(self):
+        self._requisicao()
+        return [AbaLocal(self, titulo) for titulo in self._titulos()]
+
+    def worksheet(self, titulo):
+        self._requisicao()
+        if titulo not in self._titulos():
+            raise WorksheetNotFound(titulo)
+        return AbaLocal(self, titulo)
+
+    @property
+    def sheet1(self):
+        titulos = self._titulos()
+        if not titulos:
+            raise WorksheetNotFound("sheet1")
+        return AbaLocal(self, titulos[0])
+
+    def add_worksheet(self, title, rows=LINHAS_PADRAO, cols=COLUNAS_PADRAO, index=None):
+        self._requisicao()
+        self._criar(title, int(rows), int(cols))
+        return AbaLocal(self, title)
+
+    # Recusa, como a API, uma escrita que passa da linha ou da coluna final da grade
+    def _conferir_grade(self, titulo, ultima_linha, ultima_coluna):
+        linhas, colunas = self._tamanho(titulo)
+        if ultima_linha > linhas or ultima_coluna > colunas:
+            raise ValueError(
+                f"Range ({titulo}!{rowcol_to_a1(ultima_linha, ultima_coluna)}) exceeds grid limits. "
+                f"Max rows: {linhas}, max columns: {colunas}"
+            )
+
+    def _valores(self, faixa):
+        titulo, celulas = separar_faixa(faixa)
+        if titulo not in self._titulos():
+            raise WorksheetNotFound(titulo)
+        linhas = self._ler(titulo)
+        if celulas:
+            grade = a1_range_to_grid_range(celulas)
+            linhas = linhas[grade.get("startRowIndex", 0):grade.get("endRowIndex")]
+            if "startColumnIndex" in grade or "endColumnIndex" in grade:
+                linhas = [linha[grade.get("startColumnIndex", 0):grade.get("endColumnIndex")] for linha in linhas]
+        return _aparar(linhas)
+
+    def values_batch_get(self, ranges, params=None):
+        self._requisicao()
+        colunas = (params or {}).get("majorDimension") == "COLUMNS"
+        faixas = []
+        for faixa in ranges:
+            valores = self._valores(faixa)
+            if colunas:
+                valores = _transpor(valores)
+            faixas.append({"range": faixa, "values": valores} if valores else {"range": faixa})
+        return {"spreadsheetId": self.id, "valueRanges": faixas}
+
+    def values_get(self, faixa, params=None):
+        return self.values_batch_get([faixa])["valueRanges"][0]
+
+    def values_append(self, faixa, params=None, body=None):
+        self._requisicao()
+        titulo, _ = separar_faixa(faixa)
+        if titulo not in self._titulos():
+            raise WorksheetNotFound(titulo)
+        linhas = [[_texto(valor) for valor in linha] for linha in (body or {}).get("values", [])]
+        self._conferir_grade(titulo, 1, max((len(linha) for linha in linhas), default=1))
+        inicio = self._anexar(titulo, linhas)
+        largura = max((len(linha) for linha in linhas), default=1) or 1
+        faixa_gravada = f"A{inicio + 1}:{rowcol_to_a1(inicio + max(len(linhas), 1), largura)}"
+        return {
+            "spreadsheetId": self.id,
+            "updates": {"updatedRange": absolute_range_name(titulo, faixa_gravada), "updatedRows": len(linhas)},
+        }
+
+    def values_update(self, faixa, params=None, body=None):
+        self._requisicao()
+        titulo, celulas = separar_faixa(faixa)
+        if titulo not in self._titulos():
+            raise WorksheetNotFound(titulo)
+        grade = a1_range_to_grid_range(celulas or "A1")
+        linhas = [[_texto(valor) for valor in linha] for linha in (body or {}).get("values", [])]
+        linha_inicial, coluna_inicial = grade.get("startRowIndex", 0), grade.get("startColumnIndex", 0)
+        if linhas:
+            self._conferir_grade(
+                titulo, linha_inicial + len(linhas), coluna_inicial + max((len(linha) for linha in linhas), default=1)
+            )
+        self._escrever(titulo, linha_inicial, coluna_inicial, linhas)
+        return {"spreadsheetId": self.id, "updatedRange": faixa, "updatedRows": len(linhas)}
+
+
+# Interface do gspread.Worksheet sobre uma aba da planilha local
+class AbaLocal:
+    def __init__(self, planilha, titulo):
+        self.spreadsheet = planilha
+        self.title = titulo
+
+    @property
+    def row_count(self):
+        return self.spreadsheet._tamanho(self.title)[0]
+
+    @property
+    def col_count(self):
+        return self.spreadsheet._tamanho(self.title)[1]
+
+    def resize(self, rows=None, cols=None):
+        self.spreadsheet._requisicao()
+        self.spreadsheet._redimensionar(
+            self.title, int(rows) if rows is not None else None, int(cols) if cols is not None else None
+        )
+
+    def add_rows(self, rows):
+        self.resize(rows=self.row_count + int(rows))
+
+    def add_cols(self, cols):
+        self.resize(cols=self.col_count + int(cols))
+
+    def get_all_values(self):
+        return self.get_values()
+
+    # Como no gspread, completa as linhas (ou colunas, com major_dimension='COLUMNS')
+    # com '' até o mesmo tamanho; uma aba vazia resulta em [[]]
+    def get_values(self, faixa=None, major_dimension=None):
+        valores = self.get(faixa, major_dimension)
+        if not valores:
+            return [[]]
+        largura = max(len(linha) for linha in valores)
+        return [linha + [""] * (largura - len(linha)) for linha in valores]
+
+    def get(self, faixa=None, major_dimension=None):
+        self.spreadsheet._requisicao()
+        valores = self.spreadsheet._valores(f"{self.title}!{faixa}" if faixa else self.title)
+        return _transpor(valores) if major_dimension == "COLUMNS" else valores
+
+    def row_values(self, linha):
+        valores = self.get(f"{linha}:{linha}")
+        return valores[0] if valores else []
+
+    def get_all_records(self):
+        valores = self.get_all_values()
+        if not valores[0]:
+            return []
+        cabecalho = valores[0]
+        return [dict(zip(cabecalho, numericise_all(linha))) for linha in valores[1:]]
+
+    def append_row(self, valores, value_input_option="RAW", **kwargs):
+        return self.append_rows([valores], value_input_option=value_input_option)
+
+    def append_rows(self, valores, value_input_option="RAW", **kwargs):
+        return self.spreadsheet.values_append(self.title, body={"values": valores})
+
+    def update(self, valores, faixa="A1", value_input_option="RAW", **kwargs):
+        return self.spreadsheet.values_update(f"{self.title}!{faixa}", body={"values": valores})
+
+    # Apaga as linhas de `inicio` a `fim` (numeradas a partir de 1, inclusive)
+    def delete_rows(self, inicio, fim=None):
+        self.spreadsheet._requisicao()
+        self.spreadsheet._apagar(self.title, inicio - 1, fim if fim is not None else inicio)
+
+
+def _recortar(linhas, total_linhas, total_colunas):
+    return [linha[:total_colunas] for linha in linhas[:total_linhas]]
+
+
+def _sobrepor(linhas, linha_inicial, coluna_inicial, valores):
+    for i, novos in enumerate(valores):
+        posicao = linha_inicial + i
+        while len(linhas) <= posicao:
+            linhas.append([])
+        linha = linhas[posicao]
+        if len(linha) < coluna_inicial + len(novos):
+            linha.extend([""] * (coluna_inicial + len(novos) - len(linha)))
+        linha[coluna_inicial:coluna_inicial + len(novos)] = novos
+    return linhas
+
+
+# Planilha em memória, compartilhada pelas threads do processo (clientes simulados de
+# um teste de carga e o leitor do dashboard, por exemplo)
+class PlanilhaMemoria(PlanilhaLocal):
+    def __init__(self, identificador="memoria", abas=None, **kwargs):
+        super().__init__(identificador, **kwargs)
+        self._abas = {titulo: [list(map(_texto, linha)) for linha in linhas] for titulo, linhas in (abas or {}).items()}
+        self._tamanhos = {
+            titulo: [max(LINHAS_PADRAO, len(linhas)), max([COLUNAS_PADRAO] + [len(linha) for linha in linhas])]
+            for titulo, linhas in self._abas.items()
+        }
+        self._lock = threading.Lock()
+        self._modificado_em = _agora()
+
+    def _titulos(self):
+        with self._lock:
+            return list(self._abas)
+
+    def _modificado(self):
+        with self._lock:
+            return self._modificado_em
+
+    def _criar(self, titulo, linhas, colunas):
+        with self._lock:
+            if titulo in self._abas:
+                raise ValueError(f"A aba '{titulo}' já existe.")
+            self._abas[titulo] = []
+            self._tamanhos[titulo] = [linhas, colunas]
+            self._modificado_em = _agora()
+
+    def _tamanho(self, titulo):
+        with self._lock:
+            return tuple(self._tamanhos[titulo])
+
+    def _redimensionar(self, titulo, linhas, colunas):
+        with self._lock:
+            tamanho = self._tamanhos[titulo]
+            tamanho[0] = linhas if linhas is not None else tamanho[0]
+            tamanho[1] = colunas if colunas is not None else tamanho[1]
+            self._abas[titulo] = _recortar(self._abas[titulo], *tamanho)
+            self._modificado_em = _agora()
+
+    def _ler(self, titulo):
+        with self._lock:
+            return [list(linha) for linha in self._abas[titulo]]
+
+    def _anexar(self, titulo, linhas):
+        with self._lock:
+            inicio = len(self._abas[titulo])
+            self._abas[titulo].extend(linhas)
+            self._tamanhos[titulo][0] = max(self._tamanhos[titulo][0], len(self._abas[titulo]))
+            self._modificado_em = _agora()
+            return inicio
+
+    def _escrever(self, titulo, linha_inicial, coluna_inicial, valores):
+        with self._lock:
+            _sobrepor(self._abas[titulo], linha_inicial, coluna_inicial, valores)
+            self._modificado_em = _agora()
+
+    def _apagar(self, titulo, inicio, fim):
+        with self._lock:
+            del self._abas[titulo][inicio:fim]
+            self._tamanhos[titulo][0] -= fim - inicio
+            self._modificado_em = _agora()
+
+
+# Planilha em um arquivo SQLite: uma linha da tabela por linha da aba, com os valores
+# em JSON. Vários processos (vários quiosques simulados e o dashboard) podem usar o
+# mesmo arquivo; os anexos são transações que calculam a próxima posição da aba.
+class PlanilhaSQLite(PlanilhaLocal):
+    def __init__(self, caminho=CAMINHO_SQLITE, **kwargs):
+        super().__init__(os.path.abspath(caminho), **kwargs)
+        self.caminho = caminho
+        conn = sqlite3.connect(self.caminho, timeout=60)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS abas (titulo TEXT PRIMARY KEY, ordem INTEGER, linhas INTEGER, colunas INTEGER)"
+                )
+                # Arquivos criados antes da grade: as abas existentes ficam com o tamanho padrão
+                # (ou com as linhas que já têm, se forem mais)
+                if "linhas" not in [coluna[1] for coluna in conn.execute("PRAGMA table_info(abas)")]:
+                    conn.execute(f"ALTER TABLE abas ADD COLUMN linhas INTEGER NOT NULL DEFAULT {LINHAS_PADRAO}")
+                    conn.execute(f"ALTER TABLE abas ADD COLUMN colunas INTEGER NOT NULL DEFAULT {COLUNAS_PADRAO}")
+                    conn.execute(
+                        "UPDATE abas SET linhas = MAX(linhas, (SELECT COUNT(*) FROM linhas WHERE aba = abas.titulo))"
+                    )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS linhas (aba TEXT, posicao INTEGER, valores TEXT, PRIMARY KEY (aba, posicao))"
+                )
+                conn.execute("CREATE TABLE IF NOT EXISTS metadados (chave TEXT PRIMARY KEY, valor TEXT)")
+                conn.execute("INSERT OR IGNORE INTO metadados VALUES ('modificado', ?)", (_agora(),))
+        finally:
+            conn.close()
+
+    # Transação explícita; as de escrita reservam o banco logo no início (IMMEDIATE),
+    # para que dois anexos simultâneos não calculem a mesma posição, e registram o
+    # horário da escrita (lastUpdateTime)
+    @contextmanager
+    def _conectar(self, escrita=False):
+        conn = sqlite3.connect(self.caminho, timeout=60, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if escrita else "BEGIN")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if escrita:
+                conn.execute("UPDATE metadados SET valor = ? WHERE chave = 'modificado'", (_agora(),))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _titulos(self):
+        with self._conectar() as conn:
+            return [linha[0] for linha in conn.execute("SELECT titulo FROM abas ORDER BY ordem")]
+
+    def _modificado(self):
+        with self._conectar() as conn:
+            return conn.execute("SELECT valor FROM metadados WHERE chave = 'modificado'").fetchone()[0]
+
+    def _criar(self, titulo, linhas, colunas):
+        with self._conectar(escrita=True) as conn:
+            if conn.execute("SELECT 1 FROM abas WHERE titulo = ?", (titulo,)).fetchone():
+                raise ValueError(f"A aba '{titulo}' já existe.")
+            conn.execute(
+                "INSERT INTO abas VALUES (?, (SELECT COALESCE(MAX(ordem), -1) + 1 FROM abas), ?, ?)",
+                (titulo, linhas, colunas),
+            )
+
+    def _tamanho(self, titulo):
+        with self._conectar() as conn:
+            return conn.execute("SELECT linhas, colunas FROM abas WHERE titulo = ?", (titulo,)).fetchone()
+
+    def _redimensionar(self, titulo, linhas, colunas):
+        with self._conectar(escrita=True) as conn:
+            conn.execute(
+                "UPDATE abas SET linhas = COALESCE(?, linhas), colunas = COALESCE(?, colunas) WHERE titulo = ?",
+                (linhas, colunas, titulo),
+            )
+            total_linhas, total_colunas = conn.execute(
+                "SELECT linhas, colunas FROM abas WHERE titulo = ?", (titulo,)
+            ).fetchone()
+            conn.execute("DELETE FROM linhas WHERE aba = ? AND posicao >= ?", (titulo, total_linhas))
+            largas = [
+                (posicao, json.loads(valores)) for posicao, valores in conn.execute(
+                    "SELECT posicao, valores FROM linhas WHERE aba = ?", (titulo,)
+                )
+            ]
+            conn.executemany(
+                "UPDATE linhas SET valores = ? WHERE aba = ? AND posicao = ?",
+                ((json.dumps(valores[:total_colunas], ensure_ascii=False), titulo, posicao)
+                 for posicao, valores in largas if len(valores) > total_colunas),
+            )
+
+    def _ler(self, titulo):
+        with self._conectar() as conn:
+            return [json.loads(linha[0]) for linha in conn.execute(
+                "SELECT valores FROM linhas WHERE aba = ? ORDER BY posicao", (titulo,)
+            )]
+
+    def _proxima_posicao(self, conn, titulo):
+        return conn.execute("SELECT COALESCE(MAX(posicao), -1) + 1 FROM linhas WHERE aba = ?", (titulo,)).fetchone()[0]
+
+    def _anexar(self, titulo, linhas):
+        with self._conectar(escrita=True) as conn:
+            inicio = self._proxima_posicao(conn, titulo)
+            conn.executemany(
+                "INSERT INTO linhas VALUES (?, ?, ?)",
+                ((titulo, inicio + i, json.dumps(linha, ensure_ascii=False)) for i, linha in enumerate(linhas)),
+            )
+            conn.execute(
+                "UPDATE abas SET linhas = MAX(linhas, ?) WHERE titulo = ?", (inicio + len(linhas), titulo)
+            )
+        return inicio
+
+    def _escrever(self, titulo, linha_inicial, coluna_inicial, valores):
+        with self._conectar(escrita=True) as conn:
+            fim = linha_inicial + len(valores)
+            atuais = dict(conn.execute(
+                "SELECT posicao, valores FROM linhas WHERE aba = ? AND posicao >= ? AND posicao < ?",
+                (titulo, linha_inicial, fim),
+            ))
+            linhas = [json.loads(atuais[p]) if p in atuais else [] for p in range(linha_inicial, fim)]
+            _sobrepor(linhas, 0, coluna_inicial, valores)
+            # Linhas vazias entre o fim atual da aba e o início da escrita
+            vazias = range(self._proxima_posicao(conn, titulo), linha_inicial)
+            conn.executemany("INSERT INTO linhas VALUES (?, ?, '[]')", ((titulo, p) for p in vazias))
+            conn.executemany(
+                "INSERT OR REPLACE INTO linhas VALUES (?, ?, ?)",
+                ((titulo, linha_inicial + i, json.dumps(linha, ensure_ascii=False)) for i, linha in enumerate(linhas)),
+            )
+
+    def _apagar(self, titulo, inicio, fim):
+        with self._conectar(escrita=True) as conn:
+            conn.execute("DELETE FROM linhas WHERE aba = ? AND posicao >= ? AND posicao < ?", (titulo, inicio, fim))
+            conn.execute("UPDATE abas SET linhas = linhas - ? WHERE titulo = ?", (fim - inicio, titulo))
+            # Desloca as posições seguintes em dois passos para não violar a chave primária
+            conn.execute("UPDATE linhas SET posicao = -posicao - 1 WHERE aba = ? AND posicao >= ?", (titulo, fim))
+            conn.execute(
+                "UPDATE linhas SET posicao = -posicao - 1 - ? WHERE aba = ? AND posicao < 0", (fim - inicio, titulo)
+            )
+
+
+_planilhas = {}
+_lock_planilhas = threading.Lock()
+
+
+# Planilha local do backend escolhido; a mesma instância é devolvida para o mesmo
+# backend e caminho, para que todas as partes do processo vejam os mesmos dados
+def abrir_planilha_local(backend=BACKEND_ARMAZENAMENTO, caminho=CAMINHO_SQLITE):
+    with _lock_planilhas:
+        chave = (backend, caminho if backend == "sqlite" else None)
+        if chave not in _planilhas:
+            if backend == "sqlite":
+                _planilhas[chave] = PlanilhaSQLite(caminho)
+            elif backend == "memory":
+                _planilhas[chave] = PlanilhaMemoria()
+            else:
+                raise ValueError(f"Backend de armazenamento desconhecido: '{backend}'.")
+        return _planilhas[chave]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepara uma planilha SQLite local.")
+    parser.add_argument("--sqlite", default=CAMINHO_SQLITE)
+    parser.add_argument("--importar", nargs=2, action="append", default=[], metavar=("ABA", "CSV"),
+                        help="cria (ou completa) a aba com as linhas do CSV, cabeçalho incluído")
+    args = parser.parse_args(argv)
+
+    planilha = PlanilhaSQLite(args.sqlite)
+    for titulo, caminho_csv in args.importar:
+        with open(caminho_csv, "r", encoding="utf-8-sig", newline="") as f:
+            linhas = list(csv.reader(f))
+        try:
+            aba = planilha.worksheet(titulo)
+            linhas = linhas[1:] if aba.get("1:1") else linhas
+        except WorksheetNotFound:
+            aba = planilha.add_worksheet(title=titulo, cols=max([COLUNAS_PADRAO] + [len(linha) for linha in linhas]))
+        aba.append_rows(linhas)
+        print(f"{titulo}: {len(linhas)} linhas importadas de {caminho_csv}")
+    print(f"Abas em {args.sqlite}: {', '.join(aba.title for aba in planilha.worksheets())}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
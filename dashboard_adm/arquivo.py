@@ -0,0 +1,265 @@
+# Arquivamento mensal da aba 'Logs'.
+#
+# Uso (por exemplo, no Agendador de Tarefas, no dia 1 de cada mês):
+#   python arquivo.py
+#   python arquivo.py --planilha-arquivo <ID ou URL>   # fragmentos em outra planilha
+#
+# As linhas de meses já encerrados são copiadas para uma aba por mês (Logs_AAAA-MM)
+# e depois removidas da aba 'Logs', que fica só com o mês corrente (um mês só é
+# arquivado depois de `--carencia-dias` do seu fim, para que os logins recentes
+# continuem na aba 'Logs'). A aba
+# 'Arquivo_Logs' serve de índice dos fragmentos: o dashboard lê esse índice e só
+# busca um fragmento quando o período escolhido precisa dele.
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import rowcol_to_a1
+from dotenv import load_dotenv
+from cliente_planilha import criar_cliente_planilha, SCOPE
+from ingestao import montar_dataframe, _normalizar
+from consultas import filtrar_periodo
+from espelho import DIRETORIO_ESPELHO, _gravar_parquet
+
+ABA_LOGS = "Logs"
+ABA_INDICE = "Arquivo_Logs"
+PREFIXO_FRAGMENTO = "Logs_"
+CABECALHO_INDICE = ["Mês", "Aba", "Linhas"]
+DIRETORIO_CACHE = os.path.join(DIRETORIO_ESPELHO, "arquivo")
+VALIDADE_INDICE = 600  # segundos
+LOTE_FRAGMENTOS = 12
+
+
+def _mes(momento):
+    return f"{momento:%Y-%m}"
+
+
+# Junta as linhas arquivadas (mais antigas) com as da aba 'Logs'. O índice é refeito
+# porque as posições de cada aba começam em zero; a ordem das linhas é mantida.
+def combinar_com_arquivo(arquivado, df):
+    if arquivado.empty:
+        return df
+    if df.empty:
+        return arquivado.reset_index(drop=True)
+    return pd.concat([arquivado, df], ignore_index=True)
+
+
+# Fragmentos mensais da aba 'Logs'. `cliente` é o ClientePlanilha da planilha com a aba
+# 'Logs'; `cliente_arquivo`, o da planilha que guarda os fragmentos (a mesma, se omitido).
+# Meses encerrados não mudam, então cada fragmento lido é guardado em Parquet no disco.
+class ArquivoLogs:
+    def __init__(self, cliente, cliente_arquivo=None, carencia_dias=0, diretorio_cache=DIRETORIO_CACHE,
+                 validade_indice=VALIDADE_INDICE):
+        self.cliente = cliente
+        self.cliente_arquivo = cliente_arquivo or cliente
+        self.carencia_dias = carencia_dias
+        self.diretorio_cache = diretorio_cache
+        self.validade_indice = validade_indice
+        self._indice = None
+        self._indice_lido_em = 0
+        self._verificado_em = None
+        self._lock = threading.Lock()
+
+    # --- Leitura (dashboard) ---
+
+    # {mês: (aba, linhas)}, relido da planilha quando passa de `validade_indice`
+    def indice(self, forcar=False):
+        with self._lock:
+            if forcar or self._indice is None or time.monotonic() - self._indice_lido_em > self.validade_indice:
+                self._indice = self._ler_indice()
+                self._indice_lido_em = time.monotonic()
+            return self._indice
+
+    def _ler_indice(self):
+        try:
+            valores = self.cliente_arquivo.worksheet(ABA_INDICE).get_all_values()
+        except WorksheetNotFound:
+            return {}
+        return {linha[0]: (linha[1], int(linha[2])) for linha in valores[1:] if len(linha) >= 3 and linha[0]}
+
+    def total_linhas(self):
+        return sum(linhas for _, linhas in self.indice().values())
+
+    # Os métodos de leitura aceitam um `indice` já carregado (o do snapshot do dashboard),
+    # para que a renderização não precise ler a aba 'Arquivo_Logs'
+    def meses_no_periodo(self, inicio=None, fim=None, indice=None):
+        return [
+            mes for mes in sorted(self.indice() if indice is None else indice)
+            if (inicio is None or mes >= _mes(inicio)) and (fim is None or mes <= _mes(fim))
+        ]
+
+    # Logins arquivados com Timestamp em [inicio, fim]; só os meses do período são lidos
+    def carregar_periodo(self, inicio=None, fim=None, indice=None):
+        partes = self.ler_fragmentos(self.meses_no_periodo(inicio, fim, indice), indice)
+        partes = [filtrar_periodo(parte, inicio, fim) for parte in partes if not parte.empty]
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes, ignore_index=True)
+
+    # Percorre os fragmentos um mês por vez, do mais antigo ao mais recente
+    def iterar_fragmentos(self, indice=None):
+        for mes in self.meses_no_periodo(indice=indice):
+            fragmento = self.ler_fragmentos([mes], indice)[0]
+            if not fragmento.empty:
+                yield fragmento
+
+    def ler_fragmento(self, mes):
+        return self.ler_fragmentos([mes])[0]
+
+    # Os fragmentos que não estão no cache local são buscados juntos, LOTE_FRAGMENTOS
+    # abas por requisição
+    def ler_fragmentos(self, meses, indice=None):
+        indice = self.indice() if indice is None else indice
+        fragmentos = {mes: self._ler_cache(*indice[mes]) for mes in meses}
+        faltando = [mes for mes in meses if fragmentos[mes] is None]
+        for i in range(0, len(faltando), LOTE_FRAGMENTOS):
+            lote = faltando[i:i + LOTE_FRAGMENTOS]
+            valores = self.cliente_arquivo.ler_abas([indice[mes][0] for mes in lote])
+            for mes in lote:
+                fragmentos[mes] = self._guardar_cache(*indice[mes], valores[indice[mes][0]])
+        return [fragmentos[mes] for mes in meses]
+
+    def _caminho_cache(self, aba):
+        return os.path.join(self.diretorio_cache, f"{aba}.parquet")
+
+    def _ler_cache(self, aba, linhas):
+        caminho = self._caminho_cache(aba)
+        if os.path.exists(caminho) and pq.read_metadata(caminho).num_rows == linhas:
+            return pd.read_parquet(caminho)
+        return None
+
+    def _guardar_cache(self, aba, linhas, valores):
+        if not valores:
+            return pd.DataFrame()
+        df = montar_dataframe(valores[1:], valores[0])
+        if len(df) == linhas:
+            os.makedirs(self.diretorio_cache, exist_ok=True)
+            _gravar_parquet(df, self._caminho_cache(aba))
+        return df
+
+    # --- Arquivamento ---
+
+    # Início do primeiro mês que ainda fica na aba 'Logs'
+    def _limite(self, agora):
+        referencia = agora - timedelta(days=self.carencia_dias)
+        return datetime(referencia.year, referencia.month, 1)
+
+    # Confere a primeira linha da aba 'Logs' (uma leitura) e arquiva se ela for de um mês
+    # encerrado. O dia só é dado como conferido depois que a conferência ou o arquivamento
+    # terminam: após um erro (cota, rede) ou uma aba alterada durante o arquivamento, o
+    # próximo ciclo tenta de novo.
+    def arquivar_se_preciso(self, agora=None):
+        agora = agora or datetime.now()
+        if self._verificado_em == agora.date():
+            return []
+        logs = self.cliente.worksheet(ABA_LOGS)
+        valores = logs.get("1:2")
+        if len(valores) >= 2:
+            primeira = montar_dataframe(valores[1:], valores[0])["Timestamp"].iloc[0]
+            if not pd.isna(primeira) and primeira < self._limite(agora):
+                arquivados = self.arquivar(agora)
+                if arquivados:
+                    self._verificado_em = agora.date()
+                return arquivados
+        self._verificado_em = agora.date()
+        return []
+
+    # Copia o bloco inicial de linhas de meses encerrados para os fragmentos, atualiza o
+    # índice e só então apaga essas linhas da aba 'Logs'. Se o processo for interrompido
+    # antes da remoção, a próxima execução não duplica as linhas já copiadas.
+    # Retorna [(mês, linhas arquivadas)].
+    def arquivar(self, agora=None):
+        agora = agora or datetime.now()
+        logs = self.cliente.worksheet(ABA_LOGS)
+        valores = logs.get_all_values()
+        if len(valores) < 2:
+            return []
+        cabecalho, linhas = valores[0], valores[1:]
+        timestamps = montar_dataframe(linhas, cabecalho)["Timestamp"]
+        fechadas = (timestamps < self._limite(agora)).to_numpy()
+        # Linhas sem data ou de um mês que fica na aba interrompem o bloco
+        total = len(fechadas) if fechadas.all() else int(np.argmin(fechadas))
+        if total == 0:
+            return []
+
+        meses = timestamps.iloc[:total].dt.strftime("%Y-%m").to_numpy()
+        indice = dict(self.indice(forcar=True))
+        arquivados = []
+        for mes in sorted(set(meses)):
+            lote = [linhas[i] for i in np.flatnonzero(meses == mes)]
+            aba = PREFIXO_FRAGMENTO + mes
+            fragmento, existentes = self._abrir_fragmento(aba, cabecalho, len(lote))
+            ja_copiadas = Counter(tuple(_normalizar(linha)) for linha in existentes[-len(lote):])
+            novas = []
+            for linha in lote:
+                chave = tuple(_normalizar(linha))
+                if ja_copiadas[chave]:
+                    ja_copiadas[chave] -= 1
+                else:
+                    novas.append(linha)
+            if novas:
+                fragmento.append_rows(novas, value_input_option="RAW")
+            indice[mes] = (aba, len(existentes) + len(novas))
+            arquivados.append((mes, len(lote)))
+        self._gravar_indice(indice)
+
+        # Só remove se o bloco inicial continua o mesmo que foi copiado
+        coluna_final = rowcol_to_a1(1, len(cabecalho)).rstrip("0123456789")
+        atual = logs.get(f"A2:{coluna_final}{total + 1}")
+        if [_normalizar(linha) for linha in atual] != [_normalizar(linha) for linha in linhas[:total]]:
+            print("A aba 'Logs' mudou durante o arquivamento; as linhas não foram removidas.")
+            return []
+        logs.delete_rows(2, total + 1)
+        return arquivados
+
+    # Retorna a aba do fragmento (criada se não existir) e as linhas de dados já gravadas
+    def _abrir_fragmento(self, aba, cabecalho, linhas_previstas):
+        try:
+            fragmento = self.cliente_arquivo.worksheet(aba)
+        except WorksheetNotFound:
+            planilha = self.cliente_arquivo.planilha()
+            fragmento = planilha.add_worksheet(title=aba, rows=linhas_previstas + 1, cols=len(cabecalho))
+            fragmento.update([cabecalho], "A1", value_input_option="RAW")
+            return fragmento, []
+        return fragmento, fragmento.get_all_values()[1:]
+
+    def _gravar_indice(self, indice):
+        try:
+            aba = self.cliente_arquivo.worksheet(ABA_INDICE)
+        except WorksheetNotFound:
+            aba = self.cliente_arquivo.planilha().add_worksheet(title=ABA_INDICE, rows=100, cols=len(CABECALHO_INDICE))
+        linhas = [CABECALHO_INDICE] + [[mes, nome, linhas] for mes, (nome, linhas) in sorted(indice.items())]
+        aba.update(linhas, "A1", value_input_option="RAW")
+        with self._lock:
+            self._indice = indice
+            self._indice_lido_em = time.monotonic()
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Arquiva os meses encerrados da aba 'Logs'.")
+    parser.add_argument("--credencial", default="credentials.json")
+    parser.add_argument("--planilha", default=os.getenv("GOOGLE_SHEET_ID"))
+    parser.add_argument("--planilha-arquivo", default=os.getenv("LOGS_ARCHIVE_SHEET_ID"))
+    parser.add_argument("--carencia-dias", type=int, default=int(os.getenv("DASHBOARD_HOT_DAYS") or 7),
+                        help="dias após o fim do mês antes de arquivá-lo (padrão: DASHBOARD_HOT_DAYS ou 7)")
+    args = parser.parse_args(argv)
+
+    cliente = criar_cliente_planilha(args.credencial, SCOPE, chave=args.planilha)
+    cliente_arquivo = criar_cliente_planilha(args.credencial, SCOPE, chave=args.planilha_arquivo) if args.planilha_arquivo else None
+    arquivados = ArquivoLogs(cliente, cliente_arquivo, carencia_dias=args.carencia_dias).arquivar()
+    if not arquivados:
+        print("Nenhum mês encerrado para arquivar.")
+    for mes, linhas in arquivados:
+        print(f"{mes}: {linhas} linhas arquivadas em {PREFIXO_FRAGMENTO}{mes}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+import pandas as pd
+from consultas import COLUNAS_SESSOES
+import metricas
+
+INTERVALO_ATUALIZACAO = int(os.getenv("DASHBOARD_REFRESH_SECONDS") or 30)
+MINUTOS_SESSAO_ATIVA = 36
+
+# O que a visão geral exibe, calculado de uma vez. Um snapshot publicado nunca é
+# alterado: a próxima atualização cria outro e troca a referência. As abas que
+# dependem do período escolhido consultam o espelho/banco sob demanda; o índice dos
+# fragmentos arquivados ({mês: (aba, linhas)}) vai no snapshot para que elas não
+# precisem ler a aba 'Arquivo_Logs'.
+Snapshot = namedtuple("Snapshot", [
+    "gerado_em", "total_logins", "logins_hoje", "sessoes_ativas", "violacoes", "indice_arquivo",
+])
+
+
+# Com `desde`, as violações do alerta se limitam aos logins recentes; os logins já
+# movidos para os fragmentos de `indice_arquivo` entram no total
+def montar_snapshot(consultas, agora=None, desde=None, indice_arquivo=None):
+    agora = agora or datetime.now()
+    indice_arquivo = indice_arquivo or {}
+    arquivados = sum(linhas for _, linhas in indice_arquivo.values())
+    total = consultas.total_logins()
+    with metricas.etapa("violacoes") as etapa:
+        violacoes = consultas.violacoes(inicio=desde)
+        etapa["linhas"] = len(violacoes)
+    if total == 0:
+        return Snapshot(agora, arquivados, 0, pd.DataFrame(columns=COLUNAS_SESSOES), violacoes, indice_arquivo)
+    with metricas.etapa("logins_no_dia"):
+        logins_hoje = consultas.logins_no_dia(agora)
+    with metricas.etapa("sessoes_ativas") as etapa:
+        sessoes_ativas = consultas.sessoes_ativas(agora - timedelta(minutes=MINUTOS_SESSAO_ATIVA))
+        etapa["linhas"] = len(sessoes_ativas)
+    return Snapshot(
+        gerado_em=agora,
+        total_logins=total + arquivados,
+        logins_hoje=logins_hoje,
+        sessoes_ativas=sessoes_ativas,
+        violacoes=violacoes,
+        indice_arquivo=indice_arquivo,
+    )
+
+
+# Thread em segundo plano que chama `carregar()` (que retorna um Snapshot) a cada
+# `intervalo` segundos e publica o resultado. As páginas só leem o último snapshot,
+# então o tempo de renderização não depende da latência do Google Sheets.
+class AtualizadorDashboard:
+    def __init__(self, carregar, intervalo=INTERVALO_ATUALIZACAO):
+        self._carregar = carregar
+        self.intervalo = intervalo
+        self.snapshot = None
+        self.erro = None
+        self._ciclos = 0
+        self._carregando = False
+        self._condicao = threading.Condition()
+        self._pedido = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="atualizador-dashboard", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                self._carregando = True
+            try:
+                with metricas.ciclo("atualizacao"):
+                    snapshot, erro = self._carregar(), None
+            except Exception as e:
+                print(f"Erro ao atualizar os dados do dashboard: {e}")
+                snapshot, erro = None, str(e)
+            with self._condicao:
+                if snapshot is not None:
+                    self.snapshot = snapshot
+                self.erro = erro
+                self._carregando = False
+                self._ciclos += 1
+                self._condicao.notify_all()
+            self._pedido.wait(self.intervalo)
+            self._pedido.clear()
+
+    # Retorna o último snapshot; só bloqueia enquanto a primeira carga não terminou
+    def aguardar_snapshot(self, timeout=None):
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._ciclos > 0, timeout)
+            return self.snapshot
+
+    # Pede uma atualização imediata e espera um ciclo iniciado depois do pedido terminar
+    def atualizar_agora(self, timeout=None):
+        with self._condicao:
+            ciclo = self._ciclos + (1 if self._carregando else 0)
+            self._pedido.set()
+            self._condicao.wait_for(lambda: self._ciclos > ciclo, timeout)
+            return self.snapshot
@@ -0,0 +1,255 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+import pandas as pd
+from consultas import COLUNAS_SESSOES, inicio_do_dia
+from violacoes import RegraDistintosNaJanela, regra_usuarios_por_maquina
+
+CAMINHO_BANCO = os.getenv("LOGS_SQLITE_PATH") or "logs.sqlite3"
+FORMATO_SQL = "%Y-%m-%d %H:%M:%S"
+
+
+def _q(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def _texto_sql(momento):
+    return momento.strftime(FORMATO_SQL)
+
+
+# Condição SQL (e parâmetros) que restringe o Timestamp a [inicio, fim]; usa idx_logs_ts
+def _filtro_periodo(inicio=None, fim=None, tabela=""):
+    coluna = f'{tabela}"Timestamp"'
+    condicoes, parametros = [], []
+    if inicio is not None:
+        condicoes.append(f"{coluna} >= ?")
+        parametros.append(_texto_sql(inicio))
+    if fim is not None:
+        condicoes.append(f"{coluna} <= ?")
+        parametros.append(_texto_sql(fim))
+    return " AND ".join(condicoes) or "1", parametros
+
+
+# Armazena os logs em um banco SQLite local, com índices em (Nome da Máquina, Timestamp)
+# e em Timestamp. Serve de destino para o LeitorLogsIncremental (mesma interface do
+# EspelhoLogs) e responde às consultas das abas do dashboard sem varrer o histórico.
+class BancoLogs:
+    def __init__(self, caminho=CAMINHO_BANCO, regras=None):
+        self.caminho = caminho
+        self.regras = regras if regras is not None else [regra_usuarios_por_maquina()]
+        self._lock = threading.Lock()
+        with self._conectar() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS estado (chave TEXT PRIMARY KEY, valor TEXT)")
+
+    @contextmanager
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _colunas(self, conn):
+        return [linha[1] for linha in conn.execute("PRAGMA table_info(logs)") if linha[1] != "_linha"]
+
+    def _ler(self, sql, parametros=()):
+        with self._conectar() as conn:
+            df = pd.read_sql_query(sql, conn, params=parametros, index_col="_linha")
+        df.index.name = None
+        if "Timestamp" in df.columns:
+            df["Timestamp"] = pd.to_datetime(df["Timestamp"], format=FORMATO_SQL)
+        return df
+
+    # --- Sincronização (chamada pelo LeitorLogsIncremental) ---
+
+    def _ler_estado(self):
+        with self._conectar() as conn:
+            linha = conn.execute("SELECT valor FROM estado WHERE chave = 'sincronizacao'").fetchone()
+        return json.loads(linha[0]) if linha is not None else None
+
+    def carregar(self, desde=None):
+        estado = self._ler_estado()
+        if estado is None:
+            return None
+        # Os dados ficam no banco; o leitor não precisa manter o DataFrame em memória
+        return estado["cabecalho"], estado["linhas_lidas"], estado["ultima_linha"], pd.DataFrame()
+
+    # Cabeçalho da aba 'Logs' na última sincronização ([] se o banco ainda está vazio)
+    def cabecalho(self):
+        estado = self._ler_estado()
+        return estado["cabecalho"] if estado is not None else []
+
+    def carregar_periodo(self, inicio, fim):
+        filtro, parametros = _filtro_periodo(inicio, fim)
+        return self._ler(f'SELECT * FROM logs WHERE {filtro} ORDER BY "Timestamp", _linha', parametros)
+
+    # Percorre a tabela em lotes de `tamanho` linhas, em ordem cronológica
+    def iterar_lotes(self, tamanho=10_000):
+        with self._conectar() as conn:
+            if not self._colunas(conn):
+                return
+            lotes = pd.read_sql_query(
+                'SELECT * FROM logs ORDER BY "Timestamp", _linha', conn, index_col="_linha", chunksize=tamanho
+            )
+            for df in lotes:
+                df.index.name = None
+                df["Timestamp"] = pd.to_datetime(df["Timestamp"], format=FORMATO_SQL)
+                yield df
+
+    def reescrever(self, df, cabecalho, linhas_lidas, ultima_linha):
+        with self._lock, self._conectar() as conn:
+            conn.execute("DROP TABLE IF EXISTS logs")
+            colunas = ", ".join(f"{_q(c)} TEXT" for c in df.columns)
+            conn.execute(f"CREATE TABLE logs (_linha INTEGER PRIMARY KEY, {colunas})")
+            conn.execute(f'CREATE INDEX idx_logs_maquina_ts ON logs ({_q("Nome da Máquina")}, "Timestamp")')
+            conn.execute('CREATE INDEX idx_logs_ts ON logs ("Timestamp")')
+            self._inserir(conn, df)
+            self._salvar_estado(conn, cabecalho, linhas_lidas, ultima_linha)
+
+    def anexar(self, novos, cabecalho, linhas_lidas, ultima_linha):
+        with self._lock, self._conectar() as conn:
+            self._inserir(conn, novos)
+            self._salvar_estado(conn, cabecalho, linhas_lidas, ultima_linha)
+
+    def _inserir(self, conn, df):
+        if df.empty:
+            return
+        colunas = self._colunas(conn)
+        dados = df.reindex(columns=colunas).astype(object)
+        if "Timestamp" in dados.columns:
+            dados["Timestamp"] = df["Timestamp"].dt.strftime(FORMATO_SQL).astype(object)
+        dados = dados.where(dados.notna(), None)
+        marcadores = ", ".join("?" * (len(colunas) + 1))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO logs (_linha, {', '.join(_q(c) for c in colunas)}) VALUES ({marcadores})",
+            ((int(i), *valores) for i, valores in zip(dados.index, dados.itertuples(index=False, name=None))),
+        )
+
+    def _salvar_estado(self, conn, cabecalho, linhas_lidas, ultima_linha):
+        estado = {"cabecalho": cabecalho, "linhas_lidas": linhas_lidas, "ultima_linha": ultima_linha}
+        conn.execute(
+            "INSERT OR REPLACE INTO estado (chave, valor) VALUES ('sincronizacao', ?)",
+            (json.dumps(estado, ensure_ascii=False),),
+        )
+
+    # --- Consultas das abas (mesma interface de ConsultasDataFrame) ---
+
+    def total_logins(self):
+        with self._conectar() as conn:
+            if not self._colunas(conn):
+                return 0
+            return conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+    # Um login mais recente na mesma máquina encerra a sessão anterior (ver sessoes.py)
+    def sessoes_ativas(self, limite):
+        colunas = ", ".join(f"a.{_q(c)}" for c in COLUNAS_SESSOES)
+        maquina = _q("Nome da Máquina")
+        return self._ler(
+            f"""
+            SELECT a._linha, {colunas} FROM logs a
+            WHERE a."Timestamp" > ?
+              AND NOT EXISTS (
+                SELECT 1 FROM logs b INDEXED BY idx_logs_maquina_ts
+                WHERE b.{maquina} = a.{maquina} AND a.{maquina} <> ''
+                  AND (b."Timestamp" > a."Timestamp" OR (b."Timestamp" = a."Timestamp" AND b._linha > a._linha))
+              )
+            ORDER BY a."Timestamp" DESC
+            """,
+            (_texto_sql(limite),),
+        )
+
+    def logins_no_dia(self, momento):
+        inicio = inicio_do_dia(momento)
+        with self._conectar() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM logs WHERE "Timestamp" >= ? AND "Timestamp" < ?',
+                (_texto_sql(inicio), _texto_sql(inicio + timedelta(days=1))),
+            ).fetchone()[0]
+
+    def logins_por_maquina(self, inicio=None, fim=None):
+        maquina = _q("Nome da Máquina")
+        filtro, parametros = _filtro_periodo(inicio, fim)
+        with self._conectar() as conn:
+            logins = pd.read_sql_query(
+                f'SELECT {maquina} AS "Máquina", COUNT(*) AS "Total de Logins" FROM logs WHERE {filtro} '
+                f'GROUP BY {maquina} ORDER BY "Total de Logins" DESC',
+                conn,
+                params=parametros,
+            )
+        return logins
+
+    def historico(self, inicio=None, fim=None):
+        filtro, parametros = _filtro_periodo(inicio, fim)
+        return self._ler(f'SELECT * FROM logs WHERE {filtro} ORDER BY "Timestamp" DESC', parametros)
+
+    # Regras de janela (como a de encontrar_violacoes) viram um auto-join em que cada
+    # login só é comparado com os logins do mesmo grupo na janela anterior, localizados
+    # pelo índice (grupo, Timestamp). As demais regras são avaliadas sobre as colunas
+    # de que precisam. Com [inicio, fim], só os logins do período são avaliados (a
+    # janela de cada um ainda alcança os logins anteriores ao início).
+    def violacoes(self, inicio=None, fim=None):
+        partes = []
+        for regra in self.regras:
+            if isinstance(regra, RegraDistintosNaJanela):
+                df = self._violacoes_janela(regra, inicio, fim)
+            else:
+                colunas = ", ".join(_q(c) for c in ["Timestamp"] + regra.colunas)
+                filtro, parametros = _filtro_periodo(inicio, fim)
+                df = self._ler(
+                    f'SELECT _linha, {colunas} FROM logs WHERE "Timestamp" IS NOT NULL AND {filtro}', parametros
+                )
+                df = self._linhas(regra.avaliar(df))
+                if not df.empty:
+                    df["Motivo"] = regra.motivo
+            if not df.empty:
+                df.insert(len(df.columns) - 1, "Regra", regra.nome)
+                partes.append(df)
+        if not partes:
+            return pd.DataFrame()
+        resultado = pd.concat(partes)
+        resultado["_linha"] = resultado.index
+        resultado = resultado.sort_values(by=["Timestamp", "_linha"], kind="stable").drop(columns="_linha")
+        return resultado.drop_duplicates()
+
+    def _violacoes_janela(self, regra, inicio=None, fim=None):
+        grupo, valor = _q(regra.coluna_grupo), _q(regra.coluna_valor)
+        indice = self._indice_por_grupo(regra.coluna_grupo)
+        filtro, parametros = _filtro_periodo(inicio, fim, tabela="a.")
+        df = self._ler(
+            f"""
+            SELECT a.*, COUNT(DISTINCT b.{valor}) AS distintos
+            FROM logs a
+            JOIN logs b INDEXED BY {indice}
+              ON b.{grupo} = a.{grupo}
+             AND b."Timestamp" >= datetime(a."Timestamp", ?)
+             AND b."Timestamp" <= a."Timestamp"
+            WHERE {filtro}
+            GROUP BY a._linha
+            HAVING distintos > ?
+            """,
+            (f"-{regra.janela_minutos} minutes", *parametros, regra.maximo),
+        )
+        if df.empty:
+            return df
+        df["Motivo"] = [regra.motivo_para(n) for n in df.pop("distintos")]
+        return df
+
+    def _linhas(self, indices, lote=500):
+        partes = [
+            self._ler(f"SELECT * FROM logs WHERE _linha IN ({', '.join(str(int(i)) for i in indices[i:i + lote])})")
+            for i in range(0, len(indices), lote)
+        ]
+        return pd.concat(partes) if partes else pd.DataFrame()
+
+    def _indice_por_grupo(self, coluna):
+        if coluna == "Nome da Máquina":
+            return "idx_logs_maquina_ts"
+        nome = "idx_logs_" + "".join(c if c.isalnum() else "_" for c in coluna.lower()) + "_ts"
+        with self._lock, self._conectar() as conn:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {_q(nome)} ON logs ({_q(coluna)}, "Timestamp")')
+        return _q(nome)
@@ -0,0 +1,203 @@
+# Benchmark das etapas de análise do dashboard com dados sintéticos da aba 'Logs'.
+#
+# Uso:
+#   python benchmark_dashboard.py --linhas 10000 100000 1000000
+#   python benchmark_dashboard.py --linhas 1000000 --maquinas 60 --alunos 5000 --comparar anterior.jsonl
+#
+# Cada etapa é executada uma vez para medir o tempo e outra com tracemalloc para medir
+# o pico de memória. Os resultados são acrescentados em JSON Lines ao arquivo de saída.
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from ingestao import montar_dataframe, montar_dataframe_colunas, compactar, FORMATO_TIMESTAMP
+from violacoes import encontrar_violacoes, DetectorViolacoes, regra_usuarios_por_maquina
+from consultas import ConsultasDataFrame, colunas_em_memoria
+from espelho import EspelhoLogs
+from banco import BancoLogs
+
+CABECALHO = ["Timestamp", "Nome Aluno", "Email", "Escola", "Nome da Máquina"]
+HORA_INICIO_AULAS = 7.5
+HORA_FIM_AULAS = 17.5
+
+
+# Gera `linhas` logins distribuídos pelos dias úteis a partir de `inicio`, dentro do
+# horário de aulas. Cada aluno pertence a uma escola e tende a usar sempre as mesmas
+# máquinas do laboratório dela, como acontece com as turmas do cronograma.
+def gerar_logs(linhas, maquinas, alunos, dias, escolas=4, semente=0, inicio="2025-02-03"):
+    rng = np.random.default_rng(semente)
+    dias_uteis = pd.bdate_range(inicio, periods=dias)
+    dia = dias_uteis.values[rng.integers(0, len(dias_uteis), linhas)]
+    segundos = rng.uniform(HORA_INICIO_AULAS * 3600, HORA_FIM_AULAS * 3600, linhas).astype("int64")
+    timestamps = pd.to_datetime(dia) + pd.to_timedelta(segundos, unit="s")
+
+    aluno = rng.integers(0, alunos, linhas)
+    escola = aluno % escolas
+    maquinas_por_escola = max(1, maquinas // escolas)
+    maquina = escola * maquinas_por_escola + rng.integers(0, maquinas_por_escola, linhas)
+
+    nomes = np.array([f"Aluno {i:06d}" for i in range(alunos)], dtype=object)
+    emails = np.array([f"aluno{i:06d}@escola.pr.gov.br" for i in range(alunos)], dtype=object)
+    nomes_escolas = np.array([f"ESCOLA MUNICIPAL {i + 1}" for i in range(escolas)], dtype=object)
+    nomes_maquinas = np.array([f"PC-{i + 1:03d}" for i in range(maquinas)], dtype=object)
+
+    ordem = np.argsort(timestamps.values, kind="stable")
+    return [
+        list(linha) for linha in zip(
+            timestamps[ordem].strftime(FORMATO_TIMESTAMP),
+            nomes[aluno[ordem]],
+            emails[aluno[ordem]],
+            nomes_escolas[escola[ordem]],
+            nomes_maquinas[maquina[ordem]],
+        )
+    ]
+
+
+# Uma etapa é uma função sem argumentos ou um par (preparar, executar); nesse caso só
+# executar(preparar()) é medido
+def medir(etapa):
+    preparar, executar = etapa if isinstance(etapa, tuple) else (lambda: None, lambda _: etapa())
+    estado = preparar()
+    inicio = time.perf_counter()
+    executar(estado)
+    segundos = time.perf_counter() - inicio
+    estado = preparar()
+    tracemalloc.start()
+    try:
+        executar(estado)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return segundos, pico / 2**20
+
+
+# As análises usam o df na forma compacta que o dashboard guarda em memória; o espelho
+# e o SQLite recebem as linhas completas
+def etapas(linhas_brutas, df, agora):
+    colunas = colunas_em_memoria([regra_usuarios_por_maquina()])
+    compacto = compactar(df, colunas)
+    novos = max(1, len(df) // 100)
+    df_anterior = compacto[compacto.index < len(df) - novos]
+
+    def detector_preparado():
+        detector = DetectorViolacoes()
+        detector.atualizar(df_anterior)
+        return detector
+
+    def espelho():
+        with tempfile.TemporaryDirectory() as diretorio:
+            EspelhoLogs(diretorio).reescrever(df, CABECALHO, len(df), linhas_brutas[-1])
+            EspelhoLogs(diretorio).carregar()
+
+    def sqlite():
+        with tempfile.TemporaryDirectory() as diretorio:
+            banco = BancoLogs(os.path.join(diretorio, "logs.sqlite3"))
+            banco.reescrever(df, CABECALHO, len(df), linhas_brutas[-1])
+            banco.total_logins()
+            banco.logins_por_maquina()
+            banco.violacoes()
+
+    consultas = ConsultasDataFrame(compacto)
+    return {
+        "pos_processamento": lambda: montar_dataframe(linhas_brutas, CABECALHO).sort_values(by="Timestamp", kind="stable"),
+        "conversao_colunas": (
+            lambda: [list(coluna) for coluna in zip(*linhas_brutas)],
+            lambda colunas: montar_dataframe_colunas(colunas, CABECALHO, len(linhas_brutas)),
+        ),
+        "compactacao": lambda: compactar(df, colunas),
+        "encontrar_violacoes": lambda: encontrar_violacoes(compacto),
+        "detector_carga_inicial": lambda: DetectorViolacoes().atualizar(compacto),
+        f"detector_incremental_{novos}": (detector_preparado, lambda detector: detector.atualizar(compacto)),
+        "sessoes_ativas": lambda: consultas.sessoes_ativas(agora - pd.Timedelta(minutes=36)),
+        "logins_no_dia": lambda: consultas.logins_no_dia(agora),
+        "logins_por_maquina": lambda: consultas.logins_por_maquina(),
+        "historico": lambda: consultas.historico(),
+        "espelho_parquet": espelho,
+        "sqlite": sqlite,
+    }
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def comparar(resultados, arquivo_base):
+    base = {}
+    with open(arquivo_base, "r", encoding="utf-8") as f:
+        for linha in f:
+            r = json.loads(linha)
+            base[(r["etapa"], r["linhas"])] = r
+    print(f"\nComparação com {arquivo_base} (razão atual/base):")
+    for r in resultados:
+        anterior = base.get((r["etapa"], r["linhas"]))
+        if anterior:
+            razao_tempo = r["segundos"] / anterior["segundos"] if anterior["segundos"] else float("inf")
+            razao_memoria = r["pico_memoria_mb"] / anterior["pico_memoria_mb"] if anterior["pico_memoria_mb"] else float("inf")
+            print(f"  {r['etapa']:<28} {r['linhas']:>10}  tempo x{razao_tempo:.2f}  memória x{razao_memoria:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das análises do dashboard com logs sintéticos.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--maquinas", type=int, default=40)
+    parser.add_argument("--alunos", type=int, default=3000)
+    parser.add_argument("--dias", type=int, default=None,
+                        help="dias úteis cobertos; se omitido, é derivado de --taxa")
+    parser.add_argument("--taxa", type=float, default=1.5,
+                        help="logins por máquina por hora de aula, usada para derivar --dias")
+    parser.add_argument("--etapas", nargs="+", default=None, help="executa só as etapas com esses prefixos")
+    parser.add_argument("--saida", default="benchmark_resultados.jsonl")
+    parser.add_argument("--comparar", default=None, help="arquivo JSON Lines de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    versao = versao_codigo()
+    resultados = []
+    for linhas in args.linhas:
+        horas_por_dia = HORA_FIM_AULAS - HORA_INICIO_AULAS
+        dias = args.dias or max(1, int(np.ceil(linhas / (args.maquinas * horas_por_dia * args.taxa))))
+        linhas_brutas = gerar_logs(linhas, args.maquinas, args.alunos, dias)
+        df = montar_dataframe(linhas_brutas, CABECALHO).sort_values(by="Timestamp", kind="stable")
+        agora = df["Timestamp"].iloc[-1].to_pydatetime()
+
+        print(f"\n{linhas} linhas, {args.maquinas} máquinas, {args.alunos} alunos, {dias} dias úteis")
+        compacto = compactar(df, colunas_em_memoria([regra_usuarios_por_maquina()]))
+        print(f"  memória por linha: {df.memory_usage(deep=True).sum() / linhas:.0f} bytes"
+              f" (compacto: {compacto.memory_usage(deep=True).sum() / linhas:.0f} bytes)")
+        for etapa, funcao in etapas(linhas_brutas, df, agora).items():
+            if args.etapas and not any(etapa.startswith(p) for p in args.etapas):
+                continue
+            segundos, pico = medir(funcao)
+            resultado = {
+                "etapa": etapa, "linhas": linhas, "maquinas": args.maquinas, "alunos": args.alunos,
+                "dias": dias, "segundos": round(segundos, 6), "pico_memoria_mb": round(pico, 3),
+                "versao": versao, "data": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(), "pandas": pd.__version__,
+            }
+            resultados.append(resultado)
+            print(f"  {etapa:<28} {segundos:>10.4f} s  {pico:>10.1f} MB")
+
+    with open(args.saida, "a", encoding="utf-8") as f:
+        for resultado in resultados:
+            f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
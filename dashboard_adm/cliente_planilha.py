@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+import gspread
+from gspread.utils import absolute_range_name, extract_id_from_url
+from oauth2client.service_account import ServiceAccountCredentials
+import metricas
+# planilha_local.py é compartilhado com o aplicativo do aluno
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "compartilhado"))
+from planilha_local import BACKEND_ARMAZENAMENTO, abrir_planilha_local
+
+NOME_PLANILHA = "contas_app"
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+# Cliente gspread único por processo do dashboard. Autentica uma vez, abre a planilha
+# pela chave (open_by_key não faz a busca por nome no Drive) e guarda as abas já
+# localizadas. O token de acesso é renovado pela sessão autorizada do gspread quando
+# expira, então as leituras seguintes custam só a chamada de valores.
+class ClientePlanilha:
+    def __init__(self, caminho_credencial, scope, chave=None, nome=NOME_PLANILHA):
+        self.caminho_credencial = caminho_credencial
+        self.scope = scope
+        # GOOGLE_SHEET_ID pode ser o ID ou a URL da planilha
+        self.chave = extract_id_from_url(chave) if chave and "/" in chave else chave
+        self.nome = nome
+        self._client = None
+        self._planilha = None
+        self._abas = {}
+        self._lock = threading.Lock()
+
+    def planilha(self):
+        with self._lock:
+            if self._planilha is None:
+                if self._client is None:
+                    with metricas.etapa("planilha_autenticacao"):
+                        creds = ServiceAccountCredentials.from_json_keyfile_name(self.caminho_credencial, self.scope)
+                        self._client = gspread.authorize(creds)
+                with metricas.etapa("planilha_abertura"):
+                    if self.chave:
+                        self._planilha = self._client.open_by_key(self.chave)
+                    else:
+                        self._planilha = self._client.open(self.nome)
+                        # Guarda a chave para que uma reabertura não repita a busca por nome
+                        self.chave = self._planilha.id
+            return self._planilha
+
+    def worksheet(self, titulo):
+        planilha = self.planilha()
+        with self._lock:
+            if titulo not in self._abas:
+                self._abas[titulo] = planilha.worksheet(titulo)
+            return self._abas[titulo]
+
+    # Lê várias abas inteiras em uma única requisição (values_batch_get), em vez de uma
+    # chamada por aba. Retorna {titulo: linhas}.
+    def ler_abas(self, titulos):
+        if not titulos:
+            return {}
+        resposta = self.planilha().values_batch_get([absolute_range_name(titulo) for titulo in titulos])
+        faixas = resposta.get("valueRanges", [])
+        return {titulo: faixa.get("values", []) for titulo, faixa in zip(titulos, faixas)}
+
+
+# Mesmo papel do ClientePlanilha sobre uma planilha local (SQLite ou em memória, com
+# latência simulada), usada em testes de carga sem acesso à API do Google
+class ClientePlanilhaLocal(ClientePlanilha):
+    def __init__(self, backend, chave=None):
+        super().__init__(None, None, chave=chave)
+        self.backend = backend
+
+    def planilha(self):
+        with self._lock:
+            if self._planilha is None:
+                self._planilha = abrir_planilha_local(self.backend)
+            return self._planilha
+
+
+# Cliente do backend configurado em STORAGE_BACKEND ('sheets', o padrão, 'sqlite' ou
+# 'memory'). Nos backends locais as planilhas de logs e de arquivo são a mesma.
+def criar_cliente_planilha(caminho_credencial, scope, chave=None, backend=BACKEND_ARMAZENAMENTO):
+    if backend == "sheets":
+        return ClientePlanilha(caminho_credencial, scope, chave=chave)
+    return ClientePlanilhaLocal(backend, chave=chave)
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from violacoes import encontrar_violacoes
+
+COLUNAS_SESSOES = ['Timestamp', 'Nome Aluno', 'Escola', 'Nome da Máquina']
+
+
+# Colunas do df em memória que as consultas e as `regras` usam; as demais ficam só no
+# espelho local
+def colunas_em_memoria(regras):
+    return list(dict.fromkeys(COLUNAS_SESSOES + [coluna for regra in regras for coluna in regra.colunas]))
+
+
+def inicio_do_dia(momento):
+    return datetime.combine(momento.date(), datetime.min.time())
+
+
+def filtrar_periodo(df, inicio=None, fim=None):
+    if df.empty or (inicio is None and fim is None):
+        return df
+    ts = df['Timestamp']
+    mascara = ts.notna()
+    if inicio is not None:
+        mascara &= ts >= inicio
+    if fim is not None:
+        mascara &= ts <= fim
+    return df[mascara]
+
+
+# Consultas usadas pelas abas do dashboard, calculadas sobre o DataFrame em memória.
+# O BancoLogs (banco.py) oferece os mesmos métodos respondidos por SQL com índices.
+# Com um DetectorViolacoes, as violações são atualizadas só com os logins novos.
+# Quando o df guarda só os logins recentes, `total` informa o total da planilha.
+class ConsultasDataFrame:
+    def __init__(self, df, detector=None, total=None):
+        self.df = df
+        self.detector = detector
+        self.total = total
+
+    def total_logins(self):
+        return self.total if self.total is not None else len(self.df)
+
+    def sessoes_ativas(self, limite):
+        if self.df.empty:
+            return self.df
+        ativas = self.df[self.df['Timestamp'] > limite]
+        # Um login mais recente na mesma máquina encerra a sessão anterior (ver sessoes.py)
+        maquina = ativas['Nome da Máquina']
+        encerradas = maquina.duplicated(keep='last') & maquina.notna() & (maquina != '')
+        return ativas[~encerradas][COLUNAS_SESSOES].sort_values(by='Timestamp', ascending=False)
+
+    def logins_no_dia(self, momento):
+        if self.df.empty:
+            return 0
+        inicio = inicio_do_dia(momento)
+        ts = self.df['Timestamp']
+        return int(((ts >= inicio) & (ts < inicio + timedelta(days=1))).sum())
+
+    def logins_por_maquina(self, inicio=None, fim=None):
+        if self.df.empty:
+            return pd.DataFrame(columns=['Máquina', 'Total de Logins'])
+        logins = filtrar_periodo(self.df[['Timestamp', 'Nome da Máquina']], inicio, fim)['Nome da Máquina'].value_counts()
+        # Numa coluna categórica, value_counts também lista as máquinas sem logins no período
+        logins = logins[logins > 0].reset_index()
+        logins.columns = ['Máquina', 'Total de Logins']
+        return logins
+
+    def historico(self, inicio=None, fim=None):
+        if self.df.empty:
+            return self.df
+        return filtrar_periodo(self.df, inicio, fim).sort_values(by='Timestamp', ascending=False)
+
+    # As regras são avaliadas sobre todo o df (a janela de um login pode começar antes
+    # de `inicio`) e só as violações do período são retornadas
+    def violacoes(self, inicio=None, fim=None):
+        if self.detector is not None:
+            violacoes = self.detector.atualizar(self.df)
+        else:
+            violacoes = encontrar_violacoes(self.df)
+        return filtrar_periodo(violacoes, inicio, fim)
@@ -1,116 +1,350 @@
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import pandas as pd
+import altair as alt
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
+from cliente_planilha import criar_cliente_planilha, SCOPE
+from ingestao import LeitorLogsIncremental, COLUNAS_LOGS
+from espelho import EspelhoLogs
+from arquivo import ArquivoLogs, combinar_com_arquivo
+from banco import BancoLogs
+from consultas import ConsultasDataFrame, inicio_do_dia, colunas_em_memoria
+from violacoes import DetectorViolacoes, carregar_regras, minutos_de_contexto
+from sessoes import DURACAO_SESSAO_MINUTOS, montar_sessoes, ocupacao, amostrar, utilizacao_por_maquina
+from mapa_uso import MapaUso, mapa_para_grafico
+from exportacao import FORMATOS_EXPORTACAO, exportar
+from atualizador import AtualizadorDashboard, montar_snapshot, INTERVALO_ATUALIZACAO
+import metricas
 
 load_dotenv()
 CAMINHO_CREDENCIAL = 'credentials.json'
-SCOPE = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.file",
-    "https://www.googleapis.com/auth/drive",
-]
-# Carrega e processa os dados da aba 'Logs' da planilha do Google Sheets
-@st.cache_data(ttl=30)
-def carregar_dados_log():
-    try:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(CAMINHO_CREDENCIAL, SCOPE)
-        client = gspread.authorize(creds)
-        worksheet_logs = client.open("contas_app").worksheet("Logs")
-        dados = worksheet_logs.get_all_records()
-        if not dados:
-            return pd.DataFrame()
-        df = pd.DataFrame(dados)
-        if 'Timestamp' in df.columns:
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='%d/%m/%Y %H:%M:%S')
+ID_PLANILHA = os.getenv("GOOGLE_SHEET_ID")
+# 'pandas' (padrão) mantém o histórico em memória; 'sqlite' consulta um banco local indexado
+BACKEND_DASHBOARD = (os.getenv("DASHBOARD_BACKEND") or "pandas").lower()
+# Dias de logs mantidos em memória para a visão geral e o alerta de violações;
+# períodos mais antigos são lidos do espelho local (ou do banco) sob demanda
+DIAS_EM_MEMORIA = int(os.getenv("DASHBOARD_HOT_DAYS") or 7)
+# Planilha dos fragmentos mensais da aba 'Logs' (padrão: a própria planilha) e se o
+# dashboard arquiva os meses encerrados sozinho. Desligado por padrão (use arquivo.py
+# agendado): o arquivamento apaga linhas da aba 'Logs' e não há trava entre processos,
+# então só um processo pode fazê-lo ('1' liga neste).
+ID_PLANILHA_ARQUIVO = os.getenv("LOGS_ARCHIVE_SHEET_ID")
+ARQUIVAMENTO_AUTOMATICO = os.getenv("LOGS_ARCHIVE_AUTO") == "1"
+# '1' mostra a aba de diagnóstico com o tempo de cada etapa (as métricas são sempre gravadas)
+DIAGNOSTICO_ATIVO = os.getenv("DASHBOARD_DIAGNOSTICS") == "1"
+# Intervalo, em segundos, em que a visão geral se redesenha sozinha. O snapshot só muda a
+# cada INTERVALO_ATUALIZACAO segundos, então redesenhar mais vezes não mostra nada novo
+INTERVALO_VISAO_GERAL = max(int(os.getenv("DASHBOARD_LIVE_SECONDS") or INTERVALO_ATUALIZACAO), INTERVALO_ATUALIZACAO)
+
+def inicio_janela_recente():
+    return inicio_do_dia(datetime.now()) - timedelta(days=DIAS_EM_MEMORIA)
+
+# Cliente do Google Sheets compartilhado por todas as sessões do dashboard
+@st.cache_resource
+def obter_cliente_planilha():
+    return criar_cliente_planilha(CAMINHO_CREDENCIAL, SCOPE, chave=ID_PLANILHA)
+
+# Regras de violação lidas de regras.json (sem o arquivo, vale a regra original)
+@st.cache_resource
+def obter_regras():
+    return carregar_regras()
+
+# Índice e fragmentos mensais já arquivados da aba 'Logs'
+@st.cache_resource
+def obter_arquivo():
+    cliente_arquivo = criar_cliente_planilha(CAMINHO_CREDENCIAL, SCOPE, chave=ID_PLANILHA_ARQUIVO) if ID_PLANILHA_ARQUIVO else None
+    return ArquivoLogs(obter_cliente_planilha(), cliente_arquivo, carencia_dias=DIAS_EM_MEMORIA)
+
+@st.cache_resource
+def obter_banco():
+    return BancoLogs(regras=obter_regras())
+
+# Estado das regras de violação mantido entre as execuções do script
+@st.cache_resource
+def obter_detector_violacoes():
+    return DetectorViolacoes(obter_regras())
+
+# Logins por máquina e hora da semana, atualizado a cada lote de linhas novas
+@st.cache_resource
+def obter_mapa_uso():
+    return MapaUso()
+
+# Leitor da aba 'Logs': guarda em memória os logins dos últimos DIAS_EM_MEMORIA dias
+# (em forma compacta, só com as colunas que as consultas e as regras usam), parte do
+# espelho local em Parquet e busca na planilha apenas as linhas novas a cada atualização.
+# Da planilha só vêm as COLUNAS_LOGS, que o espelho guarda para o histórico e a exportação.
+def criar_leitor_logs():
+    worksheet_logs = obter_cliente_planilha().worksheet("Logs")
+    observadores = [obter_mapa_uso()]
+    if BACKEND_DASHBOARD == "sqlite":
+        return LeitorLogsIncremental(
+            worksheet_logs, espelho=obter_banco(), manter_df=False, observadores=observadores,
+            colunas_lidas=COLUNAS_LOGS,
+        )
+    return LeitorLogsIncremental(
+        worksheet_logs, espelho=EspelhoLogs(), dias_em_memoria=DIAS_EM_MEMORIA, observadores=observadores,
+        colunas_em_memoria=colunas_em_memoria(obter_regras()), colunas_lidas=COLUNAS_LOGS,
+    )
+
+# Atualizador em segundo plano compartilhado por todas as sessões: busca os dados
+# da aba 'Logs' a cada INTERVALO_ATUALIZACAO segundos e publica um Snapshot pronto
+@st.cache_resource
+def obter_atualizador():
+    banco = obter_banco() if BACKEND_DASHBOARD == "sqlite" else None
+    detector = obter_detector_violacoes()
+    arquivo = obter_arquivo()
+    mapa_uso = obter_mapa_uso()
+    leitor = None
+
+    def carregar_dados_log():
+        nonlocal leitor
+        if ARQUIVAMENTO_AUTOMATICO:
+            try:
+                with metricas.etapa("arquivamento"):
+                    arquivo.arquivar_se_preciso()
+            except Exception as e:
+                print(f"Erro ao arquivar a aba Logs: {e}")
+        # O índice dos fragmentos é lido aqui e publicado no snapshot; as páginas só o consultam
+        indice_arquivo = arquivo.indice()
+        try:
+            faltando = mapa_uso.meses_faltando(arquivo.meses_no_periodo(indice=indice_arquivo))
+            if faltando:
+                with metricas.etapa("mapa_uso_arquivo"):
+                    mapa_uso.incluir_arquivados(arquivo.ler_fragmentos(faltando, indice_arquivo))
+        except Exception as e:
+            print(f"Erro ao incluir os meses arquivados no mapa de uso: {e}")
+        if leitor is None:
+            leitor = criar_leitor_logs()
+        df = leitor.atualizar()
+        if banco is not None:
+            consultas = banco
         else:
-            df['Timestamp'] = pd.NaT
-        return df.sort_values(by='Timestamp')
-    except Exception as e:
-        st.error(f"Erro ao carregar dados da planilha: {e}")
-        return pd.DataFrame()
-
-#Retorna logins que violaram a regra: >2 usuários únicos por máquina em 60 minutos
-def encontrar_violacoes(df):
-    if df.empty or 'Timestamp' not in df.columns:
-        return pd.DataFrame()
-    violacoes = []
-    for _, login_atual in df.iterrows():
-        maquina = login_atual['Nome da Máquina']
-        ts = login_atual['Timestamp']
-        inicio = ts - timedelta(minutes=60)
-        logs_na_janela = df[(df['Nome da Máquina'] == maquina) & (df['Timestamp'] >= inicio) & (df['Timestamp'] <= ts)]
-        usuarios_unicos = logs_na_janela['Nome Aluno'].nunique()
-        if usuarios_unicos > 2:
-            entry = login_atual.copy()
-            entry['Motivo'] = f'{usuarios_unicos} usuários únicos na última hora'
-            violacoes.append(entry)
-    if not violacoes:
-        return pd.DataFrame()
-    return pd.DataFrame(violacoes).drop_duplicates()
+            consultas = ConsultasDataFrame(df, detector=detector, total=leitor.linhas_lidas)
+        return montar_snapshot(consultas, desde=inicio_janela_recente(), indice_arquivo=indice_arquivo)
+
+    return AtualizadorDashboard(carregar_dados_log).iniciar()
+
+def fonte_local():
+    return obter_banco() if BACKEND_DASHBOARD == "sqlite" else EspelhoLogs()
+
+# Logins por máquina, violações e ocupação do laboratório em [inicio, fim] (a linha do
+# tempo de ocupação e a utilização de cada máquina). O filtro de data vai para a leitura:
+# no SQLite vira condição no Timestamp indexado; no espelho Parquet, só as partições
+# mensais do período (mais a janela das regras antes do início) são lidas. Fragmentos
+# arquivados só são buscados se o período chegar aos meses deles, segundo o
+# `indice_arquivo` do snapshot. `versao` muda quando chegam logins novos e, como o
+# índice, invalida o cache.
+@st.cache_data(show_spinner="Carregando o período...", max_entries=16)
+def analisar_periodo(inicio, fim, versao, indice_arquivo):
+    with metricas.ciclo("analise_periodo"):
+        return _analisar_periodo(inicio, fim, indice_arquivo)
+
+def _analisar_periodo(inicio, fim, indice_arquivo):
+    regras = carregar_regras()
+    # Sessões iniciadas antes do período ainda ocupam as máquinas no começo dele
+    inicio_contexto = inicio - timedelta(minutes=max(minutos_de_contexto(regras), DURACAO_SESSAO_MINUTOS))
+    arquivo = obter_arquivo()
+    if BACKEND_DASHBOARD == "sqlite" and not arquivo.meses_no_periodo(inicio_contexto, fim, indice_arquivo):
+        banco = obter_banco()
+        with metricas.etapa("violacoes_periodo"):
+            logins_por_maquina, violacoes = banco.logins_por_maquina(inicio, fim), banco.violacoes(inicio, fim)
+        with metricas.etapa("leitura_periodo") as etapa:
+            df = banco.carregar_periodo(inicio - timedelta(minutes=DURACAO_SESSAO_MINUTOS), fim)
+            etapa["linhas"] = len(df)
+    else:
+        with metricas.etapa("leitura_periodo") as etapa:
+            df = combinar_com_arquivo(
+                arquivo.carregar_periodo(inicio_contexto, fim, indice_arquivo),
+                fonte_local().carregar_periodo(inicio_contexto, fim),
+            )
+            etapa["linhas"] = len(df)
+        consultas = ConsultasDataFrame(df, detector=DetectorViolacoes(regras))
+        with metricas.etapa("violacoes_periodo", linhas=len(df)):
+            violacoes = consultas.violacoes(inicio, fim)
+        logins_por_maquina = consultas.logins_por_maquina(inicio, fim)
+
+    with metricas.etapa("ocupacao_periodo", linhas=len(df)):
+        sessoes = montar_sessoes(df)
+        fim_ocupacao = min(fim, datetime.now())
+        linha_do_tempo = amostrar(ocupacao(sessoes), inicio, fim_ocupacao)
+        utilizacao = utilizacao_por_maquina(sessoes, inicio, fim_ocupacao)
+    return logins_por_maquina, violacoes, linha_do_tempo, utilizacao
+
+@st.cache_data(show_spinner="Carregando os registros do período...", max_entries=4)
+def carregar_historico(inicio, fim, versao, indice_arquivo):
+    with metricas.ciclo("historico_periodo") as ciclo:
+        df = combinar_com_arquivo(
+            obter_arquivo().carregar_periodo(inicio, fim, indice_arquivo), fonte_local().carregar_periodo(inicio, fim)
+        )
+        ciclo["linhas"] = len(df)
+        return ConsultasDataFrame(df).historico()
+
+# Histórico completo em lotes: os fragmentos arquivados (um mês por vez) e depois o
+# espelho (um mês por vez) ou o banco (em lotes de linhas)
+def lotes_historico(arquivo, fonte, indice_arquivo):
+    yield from arquivo.iterar_fragmentos(indice_arquivo)
+    yield from fonte.iterar_lotes() if isinstance(fonte, BancoLogs) else fonte.iterar_meses()
+
+# Arquivo para o botão de download, gerado só quando o botão é clicado. Os lotes vão
+# direto para um arquivo temporário compactado; o histórico nunca fica inteiro em memória
+# como DataFrame, só o arquivo compactado que vai para o navegador.
+# As colunas seguem o cabeçalho atual da aba 'Logs', guardado no espelho/banco.
+def gerar_exportacao(formato, indice_arquivo):
+    arquivo, fonte = obter_arquivo(), fonte_local()
+
+    def gerar():
+        with metricas.ciclo(f"exportacao_{formato}"):
+            return exportar(lotes_historico(arquivo, fonte, indice_arquivo), formato, fonte.cabecalho())
+
+    return gerar
+
+# Visão geral em tempo real. Roda como fragmento: a cada INTERVALO_VISAO_GERAL segundos
+# só este trecho é reexecutado, lendo o último snapshot publicado pelo atualizador,
+# sem refazer a análise do período nem reenviar as outras abas.
+@st.fragment(run_every=INTERVALO_VISAO_GERAL)
+def mostrar_visao_geral(atualizador):
+    with metricas.ciclo("visao_geral"):
+        snapshot = atualizador.snapshot
+        sessoes_ativas = snapshot.sessoes_ativas
+        st.header("Status em Tempo Real")
+        st.caption(f"Última atualização: {snapshot.gerado_em.strftime('%d/%m/%Y %H:%M:%S')}")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Sessões Ativas Agora", len(sessoes_ativas))
+        col2.metric("Total de Logins Hoje", snapshot.logins_hoje)
+        col3.metric("Total de Logins (Geral)", snapshot.total_logins)
+        st.divider()
+        st.subheader("Tabela de Sessões Ativas")
+        if not sessoes_ativas.empty:
+            st.dataframe(sessoes_ativas, use_container_width=True)
+        else:
+            st.info("Nenhuma sessão ativa no momento.")
 
 st.set_page_config(page_title="Dashboard de Acessos", layout="wide", initial_sidebar_state="collapsed")
 st.title("Dashboard de Monitoramento de Acessos")
-st.caption(f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
 
-df_logs = carregar_dados_log()
-df_violacoes = encontrar_violacoes(df_logs)
+atualizador = obter_atualizador()
+snapshot = atualizador.aguardar_snapshot()
 
-if not df_violacoes.empty:
-    st.warning(f"🚨 ALERTA: Detectada(s) {len(df_violacoes)} violação(ões) da regra de limite de contas. Verifique a aba de alertas para mais detalhes.", icon="⚠️")
+if atualizador.erro:
+    st.error(f"Erro ao carregar dados da planilha: {atualizador.erro}")
+if snapshot is None:
+    st.stop()
+
+if not snapshot.violacoes.empty:
+    st.warning(f"🚨 ALERTA: Detectada(s) {len(snapshot.violacoes)} violação(ões) das regras de uso nos últimos {DIAS_EM_MEMORIA} dias. Verifique a aba de alertas para mais detalhes.", icon="⚠️")
 
-if df_logs.empty:
+if snapshot.total_logins == 0:
     st.warning("Ainda não há dados de log para exibir ou a planilha está vazia.")
     st.stop()
 
-agora = datetime.now()
-limite_tempo_ativo = agora - timedelta(minutes=36)
-sessoes_ativas = df_logs[df_logs['Timestamp'] > limite_tempo_ativo]
-
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Visão Geral", "💻 Análise por Máquina", "📜 Histórico Completo", "🚨 Alertas de Violação"])
-
-with tab1:
-    st.header("Status em Tempo Real")
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Sessões Ativas Agora", len(sessoes_ativas))
-    col2.metric("Total de Logins Hoje", len(df_logs[df_logs['Timestamp'].dt.date == agora.date()]))
-    col3.metric("Total de Logins (Geral)", len(df_logs))
-    st.divider()
-    st.subheader("Tabela de Sessões Ativas")
-    if not sessoes_ativas.empty:
-        cols = ['Timestamp', 'Nome Aluno', 'Escola', 'Nome da Máquina']
-        st.dataframe(sessoes_ativas[cols].sort_values(by='Timestamp', ascending=False), use_container_width=True)
-    else:
-        st.info("Nenhuma sessão ativa no momento.")
-
-with tab2:
-    st.header("Uso por Máquina")
-    col1, col2 = st.columns([1, 2])
-    with col1:
-        logins_por_maquina = df_logs['Nome da Máquina'].value_counts().reset_index()
-        logins_por_maquina.columns = ['Máquina', 'Total de Logins']
-        st.subheader("Total de Logins")
-        st.dataframe(logins_por_maquina, use_container_width=True)
-    with col2:
-        st.subheader("Gráfico de Logins por Máquina")
-        st.bar_chart(logins_por_maquina.set_index('Máquina'))
-
-with tab3:
-    st.header("Todos os Registros de Log")
-    st.dataframe(df_logs.sort_values(by='Timestamp', ascending=False), use_container_width=True)
-
-with tab4:
-    st.header("Registros de Violação da Regra de Limite")
-    st.info("Regra: no máximo 2 contas diferentes por máquina em 60 minutos. A tabela abaixo mostra as violações.")
-    if not df_violacoes.empty:
-        st.dataframe(df_violacoes[['Timestamp', 'Nome Aluno', 'Nome da Máquina', 'Motivo']], use_container_width=True)
-    else:
-        st.success("Nenhuma violação detectada")
+# Renderização medida como um ciclo das métricas (inclui a análise do período)
+with metricas.ciclo("renderizacao"):
+    # Período das abas de máquinas e de alertas (a visão geral é sempre em tempo real)
+    hoje = date.today()
+    periodo = st.date_input(
+        "Período analisado", value=(hoje - timedelta(days=DIAS_EM_MEMORIA), hoje), max_value=hoje, format="DD/MM/YYYY"
+    )
+    data_inicio, data_fim = (tuple(periodo) * 2)[:2] if periodo else (hoje, hoje)
+    inicio_periodo = datetime.combine(data_inicio, datetime.min.time())
+    fim_periodo = datetime.combine(data_fim, datetime.max.time()).replace(microsecond=0)
+    logins_por_maquina, df_violacoes, linha_do_tempo, utilizacao = analisar_periodo(
+        inicio_periodo, fim_periodo, snapshot.total_logins, snapshot.indice_arquivo
+    )
+
+    abas = ["📊 Visão Geral", "💻 Análise por Máquina", "📜 Histórico Completo", "🚨 Alertas de Violação"]
+    if DIAGNOSTICO_ATIVO:
+        abas.append("🛠️ Diagnóstico")
+    tab1, tab2, tab3, tab4, *tab_diagnostico = st.tabs(abas)
+
+    with tab1:
+        mostrar_visao_geral(atualizador)
+
+    with tab2, metricas.etapa("aba_maquinas", linhas=len(logins_por_maquina)):
+        st.header("Uso por Máquina")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.subheader("Total de Logins")
+            st.dataframe(logins_por_maquina, use_container_width=True)
+        with col2:
+            st.subheader("Gráfico de Logins por Máquina")
+            st.bar_chart(logins_por_maquina.set_index('Máquina'))
+        st.divider()
+        st.subheader("Ocupação do Laboratório")
+        st.caption(f"Máquinas em uso ao longo do período, considerando sessões de {DURACAO_SESSAO_MINUTOS} minutos encerradas pelo próximo login na mesma máquina.")
+        st.line_chart(linha_do_tempo)
+        st.subheader("Utilização por Máquina")
+        st.dataframe(utilizacao, use_container_width=True)
+        st.divider()
+        st.subheader("Mapa de Uso por Hora da Semana")
+        st.caption(f"Logins por máquina e hora da semana nos meses de {data_inicio:%m/%Y} a {data_fim:%m/%Y}.")
+        mapa = mapa_para_grafico(obter_mapa_uso().matriz(inicio_periodo, fim_periodo))
+        if not mapa.empty:
+            st.altair_chart(
+                alt.Chart(mapa).mark_rect().encode(
+                    x=alt.X('Horário:O', sort=alt.SortField('Hora da Semana'), title=None,
+                            axis=alt.Axis(labelExpr="slice(datum.label, -3) == '00h' ? datum.label : ''")),
+                    y=alt.Y('Máquina:N', title=None),
+                    color=alt.Color('Logins:Q', scale=alt.Scale(scheme='oranges')),
+                    tooltip=['Máquina', 'Horário', 'Logins'],
+                ),
+                use_container_width=True,
+            )
+
+    with tab3, metricas.etapa("aba_historico") as etapa:
+        st.header("Todos os Registros de Log")
+        st.caption("Baixe o histórico completo (incluindo os meses arquivados) para abrir em outro programa.")
+        col_csv, col_parquet = st.columns(2)
+        for coluna, formato, rotulo in [(col_csv, "csv", "Baixar CSV (gzip)"), (col_parquet, "parquet", "Baixar Parquet")]:
+            extensao, mime = FORMATOS_EXPORTACAO[formato][1:]
+            coluna.download_button(
+                rotulo, data=gerar_exportacao(formato, snapshot.indice_arquivo), file_name=f"logs_{hoje:%Y-%m-%d}.{extensao}",
+                mime=mime, on_click="ignore", use_container_width=True,
+            )
+        # Na página, só os registros do período escolhido, e apenas quando pedidos
+        if st.toggle(f"Mostrar os registros de {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}"):
+            historico = carregar_historico(inicio_periodo, fim_periodo, snapshot.total_logins, snapshot.indice_arquivo)
+            etapa["linhas"] = len(historico)
+            st.dataframe(historico, use_container_width=True)
+
+    with tab4, metricas.etapa("aba_violacoes", linhas=len(df_violacoes)):
+        st.header("Registros de Violação das Regras de Uso")
+        descricoes = "; ".join(regra.descricao for regra in obter_regras())
+        st.info(f"Regras: {descricoes}. A tabela abaixo mostra as violações de {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}.")
+        if not df_violacoes.empty:
+            st.dataframe(df_violacoes[['Timestamp', 'Nome Aluno', 'Nome da Máquina', 'Regra', 'Motivo']], use_container_width=True)
+        else:
+            st.success("Nenhuma violação detectada")
+
+# Fora do ciclo de renderização, para mostrar também a medição que acabou de terminar
+if tab_diagnostico:
+    with tab_diagnostico[0]:
+        st.header("Tempo por Etapa")
+        st.caption(f"Últimos ciclos medidos neste processo; o histórico fica em {metricas.CAMINHO_METRICAS}.")
+        ciclos = metricas.recentes()
+        if ciclos:
+            resumo = pd.DataFrame([
+                {"Início": c["inicio"], "Ciclo": c["ciclo"], "Segundos": c["segundos"],
+                 "Memória (MB)": c["memoria_mb"], "Erro": c.get("erro", "")}
+                for c in reversed(ciclos)
+            ])
+            etapas = pd.DataFrame([
+                {"Ciclo": c["ciclo"], "Etapa": e["etapa"], "Segundos": e["segundos"],
+                 "Linhas": e["linhas"], "Memória (MB)": e["memoria_mb"]}
+                for c in ciclos for e in c["etapas"]
+            ])
+            st.subheader("Ciclos")
+            st.dataframe(resumo, use_container_width=True)
+            if not etapas.empty:
+                st.subheader("Etapas (média e máximo nos últimos ciclos)")
+                agregado = etapas.groupby(["Ciclo", "Etapa"]).agg(
+                    Execuções=("Segundos", "size"), Média=("Segundos", "mean"), Máximo=("Segundos", "max"),
+                    Linhas=("Linhas", "max"), Memoria=("Memória (MB)", "max"),
+                ).rename(columns={"Memoria": "Memória máxima (MB)"}).sort_values(by="Máximo", ascending=False)
+                st.dataframe(agregado, use_container_width=True)
+        else:
+            st.info("Nenhum ciclo medido ainda.")
 
 if st.button('Recarregar Dados'):
-    st.cache_data.clear()
-    st.experimental_rerun()
\ No newline at end of file
+    atualizador.atualizar_agora()
+    st.rerun()
@@ -0,0 +1,171 @@
+import os
+import glob
+import json
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DIRETORIO_ESPELHO = os.getenv("LOGS_MIRROR_DIR") or "espelho_logs"
+ARQUIVO_ESTADO = "estado.json"
+DIRETORIO_REESCRITA = "reescrita"
+VERSAO_ESPELHO = 1
+MAX_PARTES_POR_MES = 20
+
+
+# Cópia local da aba 'Logs' em arquivos Parquet, particionados por mês do Timestamp
+# (espelho_logs/mes=AAAA-MM/*.parquet). O estado.json guarda até qual linha da
+# planilha o espelho está sincronizado, para que o leitor incremental continue dali.
+class EspelhoLogs:
+    def __init__(self, diretorio=DIRETORIO_ESPELHO):
+        self.diretorio = diretorio
+
+    def _caminho_estado(self):
+        return os.path.join(self.diretorio, ARQUIVO_ESTADO)
+
+    def _particoes(self):
+        return sorted(glob.glob(os.path.join(self.diretorio, "mes=*")))
+
+    def _ler_estado(self):
+        try:
+            with open(self._caminho_estado(), "r", encoding="utf-8") as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            return None
+        return estado if estado.get("versao") == VERSAO_ESPELHO else None
+
+    # Lê só as partições mensais que cruzam [inicio, fim] e, dentro delas, só as linhas
+    # do intervalo (filtro aplicado pelo pyarrow na leitura)
+    def _ler(self, estado, inicio=None, fim=None):
+        mes_inicio = f"mes={inicio:%Y-%m}" if inicio is not None else None
+        mes_fim = f"mes={fim:%Y-%m}" if fim is not None else None
+        filtros = []
+        if inicio is not None:
+            filtros.append(("Timestamp", ">=", pd.Timestamp(inicio)))
+        if fim is not None:
+            filtros.append(("Timestamp", "<=", pd.Timestamp(fim)))
+
+        tabelas = []
+        for particao in self._particoes():
+            nome = os.path.basename(particao)
+            if filtros and (nome == "mes=sem_data"
+                            or (mes_inicio and nome < mes_inicio) or (mes_fim and nome > mes_fim)):
+                continue
+            tabelas.extend(self._ler_particao(particao, filtros))
+        return self._montar(estado, tabelas)
+
+    def _ler_particao(self, particao, filtros=None):
+        return [
+            pq.read_table(arquivo, memory_map=True, filters=filtros or None)
+            for arquivo in sorted(glob.glob(os.path.join(particao, "*.parquet")))
+        ]
+
+    def _montar(self, estado, tabelas):
+        cabecalho = estado["cabecalho"]
+        if not tabelas:
+            df = pd.DataFrame(columns=cabecalho)
+            df["Timestamp"] = pd.Series(dtype="datetime64[ns]")
+            return df
+        df = pa.concat_tables(tabelas).to_pandas()
+        df = df.set_index("_linha")
+        df.index.name = None
+        # Partes gravadas depois do último estado salvo são descartadas
+        df = df[df.index < estado["linhas_lidas"]]
+        df = df[~df.index.duplicated(keep="last")]
+        df = df[cabecalho + [c for c in df.columns if c not in cabecalho]]
+        return df.sort_index().sort_values(by="Timestamp", kind="stable")
+
+    # Retorna (cabecalho, linhas_lidas, ultima_linha, df) ou None se não houver espelho.
+    # Com `desde`, o df traz só os logins a partir dessa data.
+    def carregar(self, desde=None):
+        estado = self._ler_estado()
+        if estado is None:
+            return None
+        df = self._ler(estado, inicio=desde)
+        return estado["cabecalho"], estado["linhas_lidas"], estado["ultima_linha"], df
+
+    # Logins com Timestamp em [inicio, fim], lidos direto do disco
+    def carregar_periodo(self, inicio, fim):
+        estado = self._ler_estado()
+        if estado is None:
+            return pd.DataFrame()
+        return self._ler(estado, inicio, fim)
+
+    # Cabeçalho da aba 'Logs' na última sincronização ([] se não houver espelho)
+    def cabecalho(self):
+        estado = self._ler_estado()
+        return estado["cabecalho"] if estado is not None else []
+
+    # Percorre o espelho um mês por vez, em ordem cronológica (os logins sem data por
+    # último), sem carregar o histórico inteiro
+    def iterar_meses(self):
+        estado = self._ler_estado()
+        if estado is None:
+            return
+        for particao in self._particoes():
+            df = self._montar(estado, self._ler_particao(particao))
+            if not df.empty:
+                yield df
+
+    # Substitui todo o conteúdo do espelho (usado após uma recarga completa da planilha).
+    # As partições novas são gravadas à parte e só trocam de lugar com as antigas depois que
+    # o estado.json é apagado: uma interrupção no meio deixa o espelho sem estado (recarregado
+    # do zero), nunca um estado que aponta para partições apagadas.
+    def reescrever(self, df, cabecalho, linhas_lidas, ultima_linha):
+        novo = EspelhoLogs(os.path.join(self.diretorio, DIRETORIO_REESCRITA))
+        shutil.rmtree(novo.diretorio, ignore_errors=True)
+        novo.anexar(df, cabecalho, linhas_lidas, ultima_linha)
+        if os.path.exists(self._caminho_estado()):
+            os.remove(self._caminho_estado())
+        for particao in self._particoes():
+            shutil.rmtree(particao)
+        for particao in novo._particoes():
+            os.rename(particao, os.path.join(self.diretorio, os.path.basename(particao)))
+        os.replace(novo._caminho_estado(), self._caminho_estado())
+        shutil.rmtree(novo.diretorio)
+
+    # Grava as linhas novas na partição do mês correspondente e avança o estado
+    def anexar(self, novos, cabecalho, linhas_lidas, ultima_linha):
+        os.makedirs(self.diretorio, exist_ok=True)
+        if not novos.empty:
+            tabela = novos.rename_axis("_linha").reset_index()
+            meses = tabela["Timestamp"].dt.strftime("%Y-%m").fillna("sem_data")
+            for mes, parte in tabela.groupby(meses, sort=False):
+                particao = os.path.join(self.diretorio, f"mes={mes}")
+                os.makedirs(particao, exist_ok=True)
+                nome = f"parte-{int(parte['_linha'].min()):09d}.parquet"
+                _gravar_parquet(parte, os.path.join(particao, nome))
+                self._compactar(particao)
+        _gravar_json(self._caminho_estado(), {
+            "versao": VERSAO_ESPELHO,
+            "cabecalho": cabecalho,
+            "linhas_lidas": linhas_lidas,
+            "ultima_linha": ultima_linha,
+        })
+
+    # Junta as partes pequenas de um mês em um único arquivo quando elas se acumulam
+    def _compactar(self, particao):
+        arquivos = sorted(glob.glob(os.path.join(particao, "*.parquet")))
+        if len(arquivos) <= MAX_PARTES_POR_MES:
+            return
+        tabela = pa.concat_tables([pq.read_table(a) for a in arquivos])
+        inicio = min(tabela.column("_linha").to_pylist())
+        destino = os.path.join(particao, f"base-{inicio:09d}.parquet")
+        _gravar_parquet(tabela, destino)
+        for arquivo in arquivos:
+            if arquivo != destino:
+                os.remove(arquivo)
+
+
+def _gravar_parquet(dados, caminho):
+    tabela = dados if isinstance(dados, pa.Table) else pa.Table.from_pandas(dados, preserve_index=False)
+    temporario = caminho + ".tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho)
+
+
+def _gravar_json(caminho, conteudo):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
@@ -0,0 +1,67 @@
+import gzip
+import tempfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ingestao import FORMATO_TIMESTAMP
+
+TAMANHO_BUFFER = 2**20
+
+
+# Colunas do arquivo exportado: `colunas` (o cabeçalho atual da aba 'Logs', que inclui as
+# colunas acrescentadas depois, como 'ID Registro') seguidas das colunas do primeiro lote
+# que não estão nele. Lotes antigos, sem alguma dessas colunas, saem com ela vazia.
+def _colunas_exportacao(colunas, lote):
+    colunas = list(colunas or [])
+    return colunas + [coluna for coluna in lote.columns if coluna not in colunas]
+
+
+# Grava os lotes (DataFrames) em CSV compactado com gzip, um lote por vez, com o
+# Timestamp de volta ao formato da planilha.
+def exportar_csv(lotes, destino, colunas=None):
+    cabecalho = None
+    with gzip.open(destino, "wt", encoding="utf-8", newline="") as f:
+        for lote in lotes:
+            primeiro = cabecalho is None
+            if primeiro:
+                cabecalho = _colunas_exportacao(colunas, lote)
+            lote.reindex(columns=cabecalho).to_csv(f, header=primeiro, index=False, date_format=FORMATO_TIMESTAMP)
+
+
+# Grava os lotes em Parquet (zstd), um row group por lote. O Timestamp é gravado como
+# data e as demais colunas como texto, para que lotes de origens diferentes (fragmentos
+# arquivados, espelho, banco) tenham o mesmo esquema.
+def exportar_parquet(lotes, destino, colunas=None):
+    escritor = None
+    try:
+        for lote in lotes:
+            if escritor is None:
+                esquema = pa.schema([
+                    (coluna, pa.timestamp("ns") if coluna == "Timestamp" else pa.string())
+                    for coluna in _colunas_exportacao(colunas, lote)
+                ])
+                escritor = pq.ParquetWriter(destino, esquema, compression="zstd")
+            dados = lote.reindex(columns=esquema.names)
+            for coluna in esquema.names:
+                if coluna != "Timestamp":
+                    dados[coluna] = dados[coluna].astype("string")
+            escritor.write_table(pa.Table.from_pandas(dados, schema=esquema, preserve_index=False))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+FORMATOS_EXPORTACAO = {
+    "csv": (exportar_csv, "csv.gz", "application/gzip"),
+    "parquet": (exportar_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+
+
+# Exporta os lotes para um arquivo temporário no disco (só um lote de DataFrame fica em
+# memória por vez) e retorna o conteúdo já compactado em bytes, um dos tipos que o
+# st.download_button aceita. O arquivo é apagado ao sair.
+def exportar(lotes, formato, colunas=None):
+    funcao = FORMATOS_EXPORTACAO[formato][0]
+    with tempfile.TemporaryFile(buffering=TAMANHO_BUFFER) as arquivo:
+        funcao(lotes, arquivo, colunas)
+        arquivo.seek(0)
+        return arquivo.read()
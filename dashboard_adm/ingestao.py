@@ -0,0 +1,337 @@
+import re
+import threading
+from itertools import zip_longest
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from gspread.utils import absolute_range_name, rowcol_to_a1
+import metricas
+
+FORMATO_TIMESTAMP = '%d/%m/%Y %H:%M:%S'
+# Colunas de texto que repetem poucos valores (máquinas, escolas, alunos) e ficam em
+# memória como categorias: um código inteiro por linha e cada texto guardado uma vez
+COLUNAS_CATEGORICAS = ['Nome Aluno', 'Email', 'Escola', 'Nome da Máquina']
+# Colunas da aba 'Logs' gravadas pelo aplicativo do aluno ('Timestamp' nas abas antigas,
+# 'Data' e 'Hora' nas atuais); anotações acrescentadas à mão na aba não são lidas
+COLUNAS_LOGS = ['Timestamp', 'Data', 'Hora', 'Nome Aluno', 'Email', 'Escola', 'Nome da Máquina', 'ID Registro']
+
+
+# Converte as linhas brutas da planilha em DataFrame, com o índice igual à posição
+# da linha nos dados (como em get_all_records) e a coluna Timestamp já convertida.
+# As linhas são transpostas em colunas (zip_longest completa as linhas curtas) e o
+# DataFrame é montado coluna a coluna.
+def montar_dataframe(linhas, cabecalho, primeiro_indice=0):
+    colunas = list(zip_longest(*linhas, fillvalue=''))[:len(cabecalho)]
+    return montar_dataframe_colunas(colunas, cabecalho, len(linhas), primeiro_indice)
+
+
+# Monta o DataFrame a partir dos valores brutos já organizados por coluna (como na
+# leitura com major_dimension='COLUMNS'), sem passar por uma lista de linhas nem por
+# um dict por linha. Cada coluna vira um array de texto (object) com `total` valores,
+# completado com '' quando a API omite as células vazias do fim.
+def montar_dataframe_colunas(colunas, cabecalho, total, primeiro_indice=0):
+    dados = {}
+    for i in range(len(cabecalho)):
+        valores = np.full(total, '', dtype=object)
+        if i < len(colunas):
+            coluna = colunas[i][:total]
+            valores[:len(coluna)] = coluna
+        dados[i] = valores
+    df = pd.DataFrame(dados, index=pd.RangeIndex(primeiro_indice, primeiro_indice + total), copy=False)
+    df.columns = list(cabecalho)
+    df['Timestamp'] = converter_timestamp(df)
+    return df
+
+
+# Timestamp dos logins: a coluna 'Timestamp' ou, nas abas gravadas pelo aplicativo do
+# aluno, as colunas 'Data' e 'Hora'
+def converter_timestamp(df):
+    if 'Timestamp' in df.columns:
+        return pd.Series(converter_texto_timestamp(df['Timestamp'].to_numpy()), index=df.index)
+    if 'Data' in df.columns and 'Hora' in df.columns:
+        texto = (df['Data'] + ' ' + df['Hora']).where(df['Data'] != '', '')
+        return pd.Series(converter_texto_timestamp(texto.to_numpy()), index=df.index)
+    return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+
+
+MODELO_TIMESTAMP = np.frombuffer(b'00/00/0000 00:00:00', dtype=np.uint8)
+POSICOES_DIGITOS = MODELO_TIMESTAMP == ord('0')
+
+
+# Converte textos 'DD/MM/AAAA HH:MM:SS' em datetime64 lendo os dígitos direto dos bytes,
+# sem o strptime por valor que o pd.to_datetime usa para esse formato. Textos vazios
+# viram NaT; os que fogem do formato fixo (sem zeros à esquerda, por exemplo) são
+# convertidos pelo pd.to_datetime, que também rejeita os inválidos como antes.
+def converter_texto_timestamp(valores):
+    valores = np.asarray(valores, dtype=object)
+    try:
+        brutos = valores.astype('S20').view(np.uint8).reshape(len(valores), 20)
+    except (UnicodeEncodeError, ValueError):
+        return pd.to_datetime(pd.Series(valores), format=FORMATO_TIMESTAMP).to_numpy()
+    caracteres = brutos[:, :19]
+    validos = (brutos[:, 19] == 0) & np.all(
+        np.where(POSICOES_DIGITOS, (caracteres >= ord('0')) & (caracteres <= ord('9')), caracteres == MODELO_TIMESTAMP),
+        axis=1,
+    )
+
+    def numero(*posicoes):
+        total = np.zeros(len(valores), dtype=np.int64)
+        for posicao in posicoes:
+            total = total * 10 + caracteres[:, posicao] - ord('0')
+        return total
+
+    dia, mes, ano = numero(0, 1), numero(3, 4), numero(6, 7, 8, 9)
+    hora, minuto, segundo = numero(11, 12), numero(14, 15), numero(17, 18)
+    validos &= (mes >= 1) & (mes <= 12) & (dia >= 1) & (hora < 24) & (minuto < 60) & (segundo < 60)
+    meses = np.where(validos, (ano - 1970) * 12 + mes - 1, 0).astype('datetime64[M]')
+    datas = meses.astype('datetime64[D]') + np.where(validos, dia - 1, 0)
+    # Dias que não existem no mês (31/04, 29/02 fora de ano bissexto) passariam para o mês seguinte
+    validos &= datas.astype('datetime64[M]') == meses
+    resultado = datas.astype('datetime64[ns]') + ((hora * 60 + minuto) * 60 + segundo).astype('timedelta64[s]')
+    resultado[~validos] = np.datetime64('NaT')
+
+    fora_do_formato = ~validos & (valores != '')
+    if fora_do_formato.any():
+        resultado[fora_do_formato] = pd.to_datetime(
+            pd.Series(valores[fora_do_formato]), format=FORMATO_TIMESTAMP
+        ).to_numpy(dtype='datetime64[ns]')
+    return resultado
+
+
+# Forma compacta do DataFrame de logins, usada para o que fica em memória: as
+# COLUNAS_CATEGORICAS viram categorias e, com `colunas`, as demais colunas são
+# descartadas. O Timestamp continua datetime64 (8 bytes por linha). Os agrupamentos e
+# contagens (pd.factorize, duplicated, value_counts) passam a usar os códigos inteiros.
+def compactar(df, colunas=None):
+    if colunas is not None:
+        df = df[[coluna for coluna in df.columns if coluna in colunas]]
+    return pd.DataFrame({
+        coluna: df[coluna].astype('category') if coluna in COLUNAS_CATEGORICAS else df[coluna]
+        for coluna in df.columns
+    }, index=df.index)
+
+
+# Acrescenta `novos` ao DataFrame compacto `df`. As categorias de `df` são mantidas e
+# os valores inéditos de `novos` entram no fim, então os códigos existentes não mudam
+# e o resultado continua compacto (um pd.concat de categorias diferentes voltaria a
+# guardar texto por linha).
+def concatenar_compactos(df, novos):
+    novos = compactar(novos, list(df.columns))
+    dados = {}
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            dados[coluna] = union_categoricals([df[coluna].array, novos[coluna].array])
+        else:
+            dados[coluna] = np.concatenate([df[coluna].to_numpy(), novos[coluna].to_numpy()])
+    return pd.DataFrame(dados, index=df.index.append(novos.index))
+
+
+def _letra_coluna(posicao):
+    return re.sub(r'\d', '', rowcol_to_a1(1, posicao + 1))
+
+
+# Mantém em memória o DataFrame da aba 'Logs' e, a cada atualização, busca apenas
+# as linhas adicionadas desde a última leitura (faixa A{n}:F). A última linha já lida
+# é relida junto para detectar se a aba foi editada ou truncada; nesse caso, recarrega tudo.
+# Só as `colunas_lidas` (todas as que têm nome no cabeçalho, se omitidas) são buscadas,
+# localizadas pelo cabeçalho; ele é relido na mesma requisição das linhas novas e, se
+# as colunas mudarem de lugar ou surgir uma coluna lida, a aba é recarregada.
+# Com um `espelho` (EspelhoLogs ou BancoLogs), o histórico é restaurado do disco na
+# primeira leitura e cada lote de linhas novas é gravado nele. Com manter_df=False o
+# leitor só sincroniza o espelho, sem guardar o histórico em memória; com
+# dias_em_memoria, guarda só os logins recentes e o restante fica no espelho. O df
+# em memória fica na forma compacta (ver compactar), só com as `colunas_em_memoria`
+# (todas, se omitidas); o espelho e os observadores recebem as linhas completas.
+# Os `observadores` (como o MapaUso) recebem os mesmos lotes que o espelho; um observador
+# fora de sincronia com o leitor é reconstruído a partir do histórico local.
+class LeitorLogsIncremental:
+    def __init__(self, worksheet, espelho=None, manter_df=True, dias_em_memoria=None, observadores=(),
+                 colunas_em_memoria=None, colunas_lidas=None):
+        self.worksheet = worksheet
+        self.colunas_lidas = colunas_lidas
+        self.espelho = espelho
+        self.observadores = list(observadores)
+        self.manter_df = manter_df
+        self.dias_em_memoria = dias_em_memoria
+        self.colunas_em_memoria = colunas_em_memoria
+        self.cabecalho = None
+        self._posicoes = None  # posição na aba de cada coluna do cabeçalho
+        self.linhas_lidas = 0  # linhas de dados (sem o cabeçalho) já incorporadas
+        self.df = pd.DataFrame()
+        self._ultima_linha = None
+        self._lock = threading.Lock()
+
+    def _limite_memoria(self):
+        if self.dias_em_memoria is None:
+            return None
+        hoje = datetime.combine(datetime.now().date(), datetime.min.time())
+        return hoje - timedelta(days=self.dias_em_memoria)
+
+    def _aparar(self, df):
+        limite = self._limite_memoria()
+        if limite is None or df.empty:
+            return df
+        return df[df['Timestamp'] >= limite]
+
+    def _compactar(self, df):
+        with metricas.etapa("compactacao", linhas=len(df)):
+            return compactar(df, self.colunas_em_memoria)
+
+    # Posições e nomes das colunas lidas, segundo a linha de cabeçalho da aba
+    def _mapear_colunas(self, cabecalho_planilha):
+        posicoes = [
+            i for i, nome in enumerate(cabecalho_planilha)
+            if nome and (self.colunas_lidas is None or nome in self.colunas_lidas)
+        ]
+        return posicoes, [cabecalho_planilha[i] for i in posicoes]
+
+    # Lê as colunas lidas a partir da `linha` em uma única requisição, uma faixa por
+    # trecho de colunas vizinhas (A1:F, H1:H...), depois das faixas `extras`. Retorna os
+    # valores das faixas extras e os trechos de colunas, cada um com a sua largura.
+    def _ler_colunas(self, linha, major_dimension, extras=()):
+        trechos = []
+        for posicao in self._posicoes:
+            if trechos and posicao == trechos[-1][1] + 1:
+                trechos[-1][1] = posicao
+            else:
+                trechos.append([posicao, posicao])
+        faixas = list(extras) + [f"{_letra_coluna(inicio)}{linha}:{_letra_coluna(fim)}" for inicio, fim in trechos]
+        resposta = self.worksheet.spreadsheet.values_batch_get(
+            [absolute_range_name(self.worksheet.title, faixa) for faixa in faixas],
+            params={"majorDimension": major_dimension},
+        )
+        valores = [faixa.get("values", []) for faixa in resposta.get("valueRanges", [])]
+        valores += [[]] * (len(faixas) - len(valores))
+        return valores[:len(extras)], [
+            (fim - inicio + 1, trecho) for (inicio, fim), trecho in zip(trechos, valores[len(extras):])
+        ]
+
+    # Leitura completa organizada por coluna: a API já entrega cada coluna como uma
+    # lista, que vira direto uma coluna do DataFrame
+    def _recarregar(self):
+        with metricas.etapa("planilha_leitura_completa") as etapa:
+            self._posicoes, cabecalho = self._mapear_colunas(self.worksheet.row_values(1))
+            colunas = []
+            if self._posicoes:
+                for largura, trecho in self._ler_colunas(1, "COLUMNS")[1]:
+                    colunas += trecho + [[]] * (largura - len(trecho))
+            etapa["linhas"] = max((len(coluna) for coluna in colunas), default=0)
+        if not any(colunas):
+            self.cabecalho, self._posicoes, self.linhas_lidas, self._ultima_linha = None, None, 0, None
+            self.df = pd.DataFrame()
+            return self.df
+        total = max(len(coluna) for coluna in colunas) - 1
+        with metricas.etapa("conversao_dataframe", linhas=total):
+            df = montar_dataframe_colunas([coluna[1:] for coluna in colunas], cabecalho, total)
+        with metricas.etapa("ordenacao", linhas=len(df)):
+            df = df.sort_values(by='Timestamp', kind='stable')
+        self.cabecalho = cabecalho
+        self.linhas_lidas = total
+        self._ultima_linha = [coluna[total] if len(coluna) > total else '' for coluna in colunas] if total else cabecalho
+        if self.espelho is not None:
+            with metricas.etapa("espelho_reescrita", linhas=len(df)):
+                self.espelho.reescrever(df, cabecalho, self.linhas_lidas, self._ultima_linha)
+        for observador in self.observadores:
+            observador.reescrever(df, cabecalho, self.linhas_lidas, self._ultima_linha)
+        self.df = self._compactar(self._aparar(df) if self.manter_df else df.iloc[0:0])
+        return self.df
+
+    def _restaurar_espelho(self):
+        try:
+            with metricas.etapa("espelho_restauracao") as etapa:
+                estado = self.espelho.carregar(desde=self._limite_memoria())
+                etapa["linhas"] = len(estado[3]) if estado is not None else 0
+        except Exception as e:
+            print(f"Espelho local ilegível, recarregando da planilha: {e}")
+            return False
+        if estado is None:
+            return False
+        self.cabecalho, self.linhas_lidas, self._ultima_linha, df = estado
+        self.df = self._compactar(df)
+        self._sincronizar_observadores()
+        return True
+
+    def _sincronizar_observadores(self):
+        atrasados = [o for o in self.observadores if not o.sincronizado(self.linhas_lidas, self._ultima_linha)]
+        if not atrasados:
+            return
+        with metricas.etapa("observadores_reconstrucao") as etapa:
+            historico = self.espelho.carregar_periodo(None, None) if self.espelho is not None else self.df
+            etapa["linhas"] = len(historico)
+            for observador in atrasados:
+                observador.reescrever(historico, self.cabecalho, self.linhas_lidas, self._ultima_linha)
+
+    def atualizar(self):
+        with self._lock:
+            if self.cabecalho is None:
+                if self.espelho is None or not self._restaurar_espelho():
+                    return self._recarregar()
+
+            # Depois de restaurar o espelho, as colunas são localizadas pelo cabeçalho atual
+            if self._posicoes is None:
+                self._posicoes, cabecalho = self._mapear_colunas(self.worksheet.row_values(1))
+                if not self._posicoes or cabecalho != self.cabecalho:
+                    return self._recarregar()
+
+            # Linha 1 é o cabeçalho; a última linha já lida (ou o próprio cabeçalho) fica em linhas_lidas + 1
+            linha_ancora = self.linhas_lidas + 1
+            with metricas.etapa("planilha_linhas_novas") as etapa:
+                (cabecalho_planilha,), trechos = self._ler_colunas(linha_ancora, "ROWS", extras=["1:1"])
+                linhas = _juntar_trechos(trechos)
+                etapa["linhas"] = len(linhas)
+
+            cabecalho_planilha = cabecalho_planilha[0] if cabecalho_planilha else []
+            if self._mapear_colunas(cabecalho_planilha) != (self._posicoes, self.cabecalho):
+                return self._recarregar()
+            ancora = linhas[0] if linhas else []
+            if _normalizar(ancora) != _normalizar(self._ultima_linha):
+                return self._recarregar()
+            linhas = linhas[1:]
+            if not linhas:
+                return self.df
+
+            with metricas.etapa("conversao_dataframe", linhas=len(linhas)):
+                novos = montar_dataframe(linhas, self.cabecalho, primeiro_indice=self.linhas_lidas)
+            self._sincronizar_observadores()
+            if self.manter_df:
+                with metricas.etapa("ordenacao") as etapa:
+                    df = concatenar_compactos(self.df, novos) if not self.df.empty else self._compactar(novos)
+                    if not df['Timestamp'].is_monotonic_increasing:
+                        df = df.sort_values(by='Timestamp', kind='stable')
+                    self.df = self._aparar(df)
+                    etapa["linhas"] = len(self.df)
+
+            self.linhas_lidas += len(linhas)
+            self._ultima_linha = linhas[-1]
+            if self.espelho is not None:
+                with metricas.etapa("espelho_anexo", linhas=len(novos)):
+                    self.espelho.anexar(novos, self.cabecalho, self.linhas_lidas, self._ultima_linha)
+            if self.observadores:
+                with metricas.etapa("observadores_anexo", linhas=len(novos)):
+                    for observador in self.observadores:
+                        observador.anexar(novos, self.cabecalho, self.linhas_lidas, self._ultima_linha)
+            return self.df
+
+
+# Junta, linha a linha, os trechos de colunas lidos com major_dimension='ROWS'. Com um
+# trecho só, as linhas já estão prontas; com vários, cada parte é completada com '' até
+# a largura do seu trecho (a API omite as células vazias do fim).
+def _juntar_trechos(trechos):
+    if len(trechos) == 1:
+        return trechos[0][1]
+    total = max((len(linhas) for _, linhas in trechos), default=0)
+    juntas = [[] for _ in range(total)]
+    for largura, linhas in trechos:
+        for i, linha in enumerate(juntas):
+            parte = linhas[i] if i < len(linhas) else []
+            linha += parte + [''] * (largura - len(parte))
+    return juntas
+
+
+# A API omite células vazias no fim da linha; compara linhas ignorando esse detalhe
+def _normalizar(linha):
+    linha = list(linha or [])
+    while linha and linha[-1] == '':
+        linha.pop()
+    return linha
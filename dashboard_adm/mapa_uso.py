@@ -0,0 +1,141 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from espelho import DIRETORIO_ESPELHO
+from ingestao import _normalizar
+
+CAMINHO_MAPA_USO = os.path.join(DIRETORIO_ESPELHO, "mapa_uso.npz")
+HORAS_SEMANA = 7 * 24
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+
+def hora_da_semana(timestamps):
+    return (timestamps.dt.dayofweek * 24 + timestamps.dt.hour).to_numpy()
+
+
+# Contagem de logins por máquina e hora da semana (segunda 0h = 0 ... domingo 23h = 167),
+# separada por mês: contagens[mês, máquina, hora] em int32. Recebe os mesmos lotes que o
+# espelho (reescrever/anexar), então cada login é contado uma vez só, e é gravada em
+# disco a cada lote. Uma reescrita recalcula apenas os meses presentes na aba 'Logs':
+# os meses já arquivados mantêm as contagens que tinham.
+class MapaUso:
+    def __init__(self, caminho=CAMINHO_MAPA_USO):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self.meses = []
+        self.maquinas = []
+        self.contagens = np.zeros((0, 0, HORAS_SEMANA), dtype=np.int32)
+        self.linhas_lidas = None
+        self.ultima_linha = None
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with np.load(self.caminho, allow_pickle=False) as dados:
+                self.meses = dados["meses"].tolist()
+                self.maquinas = dados["maquinas"].tolist()
+                self.contagens = dados["contagens"].astype(np.int32)
+                self.linhas_lidas = int(dados["linhas_lidas"]) if dados["linhas_lidas"] >= 0 else None
+                self.ultima_linha = dados["ultima_linha"].tolist()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Mapa de uso ilegível, será recalculado: {e}")
+
+    def _gravar(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = self.caminho + ".tmp.npz"
+        np.savez(
+            temporario,
+            meses=np.array(self.meses, dtype=str),
+            maquinas=np.array(self.maquinas, dtype=str),
+            contagens=self.contagens,
+            linhas_lidas=np.int64(-1 if self.linhas_lidas is None else self.linhas_lidas),
+            ultima_linha=np.array(self.ultima_linha or [], dtype=str),
+        )
+        os.replace(temporario, self.caminho)
+
+    # O mapa reflete exatamente as linhas que o leitor já incorporou?
+    def sincronizado(self, linhas_lidas, ultima_linha):
+        with self._lock:
+            return self.linhas_lidas == linhas_lidas and _normalizar(self.ultima_linha) == _normalizar(ultima_linha)
+
+    def _indices(self, valores, conhecidos):
+        existentes = set(conhecidos)
+        conhecidos.extend(sorted(valor for valor in pd.unique(valores) if valor not in existentes))
+        return pd.Index(conhecidos).get_indexer(valores)
+
+    # Soma o lote às contagens (O(n) no tamanho do lote), ampliando a matriz se
+    # aparecerem meses ou máquinas novos
+    def _somar(self, df):
+        validos = df[df['Timestamp'].notna() & df['Nome da Máquina'].notna() & (df['Nome da Máquina'] != '')]
+        if validos.empty:
+            return
+        mes = self._indices(validos['Timestamp'].dt.strftime('%Y-%m').to_numpy(), self.meses)
+        maquina = self._indices(validos['Nome da Máquina'].to_numpy(), self.maquinas)
+        forma = (len(self.meses), len(self.maquinas), HORAS_SEMANA)
+        if self.contagens.shape != forma:
+            ampliada = np.zeros(forma, dtype=np.int32)
+            ampliada[:self.contagens.shape[0], :self.contagens.shape[1]] = self.contagens
+            self.contagens = ampliada
+        posicao = (mes * forma[1] + maquina) * HORAS_SEMANA + hora_da_semana(validos['Timestamp'])
+        self.contagens += np.bincount(posicao, minlength=self.contagens.size).astype(np.int32).reshape(forma)
+
+    # Substitui as contagens dos meses presentes em df pelas de df
+    def _recontar(self, df):
+        if df.empty:
+            return
+        meses_presentes = set(df['Timestamp'].dropna().dt.strftime('%Y-%m'))
+        for i, mes in enumerate(self.meses):
+            if mes in meses_presentes:
+                self.contagens[i] = 0
+        self._somar(df)
+
+    def reescrever(self, df, cabecalho, linhas_lidas, ultima_linha):
+        with self._lock:
+            self._recontar(df)
+            self.linhas_lidas, self.ultima_linha = linhas_lidas, ultima_linha
+            self._gravar()
+
+    def anexar(self, novos, cabecalho, linhas_lidas, ultima_linha):
+        with self._lock:
+            self._somar(novos)
+            self.linhas_lidas, self.ultima_linha = linhas_lidas, ultima_linha
+            self._gravar()
+
+    # Meses arquivados que o mapa ainda não contou (por exemplo, arquivados antes de
+    # o mapa existir)
+    def meses_faltando(self, meses):
+        with self._lock:
+            return [mes for mes in meses if mes not in self.meses]
+
+    def incluir_arquivados(self, fragmentos):
+        with self._lock:
+            for fragmento in fragmentos:
+                self._recontar(fragmento)
+            self._gravar()
+
+    # Matriz máquina × hora da semana somando os meses que cruzam [inicio, fim]
+    # (todos, se omitidos). Linhas: máquinas; colunas: as 168 horas da semana.
+    def matriz(self, inicio=None, fim=None):
+        with self._lock:
+            selecionados = [
+                i for i, mes in enumerate(self.meses)
+                if (inicio is None or mes >= f"{inicio:%Y-%m}") and (fim is None or mes <= f"{fim:%Y-%m}")
+            ]
+            contagens = self.contagens[selecionados].sum(axis=0) if selecionados else np.zeros(
+                (len(self.maquinas), HORAS_SEMANA), dtype=np.int64
+            )
+            return pd.DataFrame(contagens, index=pd.Index(self.maquinas, name='Máquina'))
+
+
+def rotulo_hora(hora):
+    return f"{DIAS_SEMANA[hora // 24]} {hora % 24:02d}h"
+
+
+# Formato longo da matriz para o gráfico: (Máquina, Hora da Semana, Logins, Horário)
+def mapa_para_grafico(matriz):
+    longo = matriz.rename_axis(columns='Hora da Semana').stack().rename('Logins').reset_index()
+    longo['Horário'] = [rotulo_hora(hora) for hora in longo['Hora da Semana']]
+    return longo
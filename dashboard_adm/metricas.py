@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+try:
+    import psutil
+except ImportError:  # sem psutil, a variação de memória não é medida
+    psutil = None
+
+CAMINHO_METRICAS = os.getenv("DASHBOARD_METRICS_PATH") or "metricas_dashboard.jsonl"
+TAMANHO_MAXIMO_METRICAS = 5 * 2**20
+ARQUIVOS_ANTIGOS_METRICAS = 3
+CICLOS_EM_MEMORIA = 200
+
+_local = threading.local()
+_recentes = deque(maxlen=CICLOS_EM_MEMORIA)
+_lock = threading.Lock()
+_logger = None
+
+
+def _memoria_mb():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _variacao(antes):
+    depois = _memoria_mb()
+    return None if antes is None or depois is None else round(depois - antes, 3)
+
+
+# Arquivo JSON Lines com rotação por tamanho (metricas_dashboard.jsonl, .1, .2, ...)
+def _registrador():
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("metricas_dashboard")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = RotatingFileHandler(
+                CAMINHO_METRICAS, maxBytes=TAMANHO_MAXIMO_METRICAS,
+                backupCount=ARQUIVOS_ANTIGOS_METRICAS, encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def _publicar(registro):
+    with _lock:
+        _recentes.append(registro)
+    try:
+        _registrador().info(json.dumps(registro, ensure_ascii=False))
+    except OSError as e:
+        print(f"Erro ao gravar as métricas do dashboard: {e}")
+
+
+# Mede um ciclo completo (uma atualização dos dados, uma renderização da página...).
+# As etapas executadas na mesma thread durante o ciclo entram no registro, que é
+# guardado em memória para a aba de diagnóstico e gravado no arquivo de métricas.
+@contextmanager
+def ciclo(nome):
+    if getattr(_local, "ciclo", None) is not None:
+        with etapa(nome) as registro:
+            yield registro
+        return
+    registro = {"ciclo": nome, "inicio": datetime.now().isoformat(timespec="seconds"), "etapas": []}
+    _local.ciclo = registro
+    memoria = _memoria_mb()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    except Exception as e:
+        registro["erro"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _local.ciclo = None
+        registro["segundos"] = round(time.perf_counter() - inicio, 6)
+        registro["memoria_mb"] = _variacao(memoria)
+        _publicar(registro)
+
+
+# Mede uma etapa do ciclo em andamento; fora de um ciclo não mede nada. Quem chama
+# pode preencher registro["linhas"] com a quantidade de linhas processadas.
+@contextmanager
+def etapa(nome, linhas=None):
+    atual = getattr(_local, "ciclo", None)
+    registro = {"etapa": nome, "linhas": linhas}
+    if atual is None:
+        yield registro
+        return
+    memoria = _memoria_mb()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro["segundos"] = round(time.perf_counter() - inicio, 6)
+        registro["memoria_mb"] = _variacao(memoria)
+        atual["etapas"].append(registro)
+
+
+def recentes():
+    with _lock:
+        return list(_recentes)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Mesma duração usada pelo aplicativo do aluno (SESSION_DURATION_MINUTES)
+DURACAO_SESSAO_MINUTOS = 35
+COLUNAS_SESSAO = ['Nome da Máquina', 'Nome Aluno', 'Início', 'Fim']
+
+
+# Converte logins em intervalos de sessão. Cada sessão dura `duracao_minutos`, mas
+# termina antes se a mesma máquina registrar outro login (o aplicativo do aluno só
+# aceita um login por vez). Se `coluna_fim` existir no df, o fim registrado nela
+# prevalece quando preenchido. Logins sem data ou sem máquina são ignorados.
+# Ordena por (máquina, Timestamp): O(n log n).
+def montar_sessoes(df, duracao_minutos=DURACAO_SESSAO_MINUTOS, coluna_fim='Fim'):
+    if df.empty or 'Timestamp' not in df.columns:
+        return pd.DataFrame(columns=COLUNAS_SESSAO)
+    validos = df[df['Timestamp'].notna() & df['Nome da Máquina'].notna() & (df['Nome da Máquina'] != '')]
+    maquina, _ = pd.factorize(validos['Nome da Máquina'])
+    inicio = validos['Timestamp'].to_numpy(dtype='datetime64[ns]')
+    ordem = np.lexsort((inicio, maquina))
+    maquina, inicio = maquina[ordem], inicio[ordem]
+
+    fim = inicio + np.timedelta64(duracao_minutos, 'm')
+    if coluna_fim in validos.columns:
+        registrado = pd.to_datetime(validos[coluna_fim], errors='coerce').to_numpy(dtype='datetime64[ns]')[ordem]
+        fim = np.where(np.isnat(registrado), fim, registrado)
+    mesma_maquina = maquina[1:] == maquina[:-1]
+    proximo = np.r_[inicio[1:], np.datetime64('NaT')]
+    interrompida = np.r_[mesma_maquina, False] & (proximo < fim)
+    fim = np.where(interrompida, proximo, fim)
+
+    return pd.DataFrame({
+        'Nome da Máquina': validos['Nome da Máquina'].to_numpy()[ordem],
+        'Nome Aluno': validos['Nome Aluno'].to_numpy()[ordem],
+        'Início': inicio,
+        'Fim': fim,
+    }, index=validos.index[ordem])
+
+
+# Varredura (sweep-line) sobre os intervalos: +1 em cada início, -1 em cada fim. Retorna
+# a função degrau da ocupação (Momento, Ocupação), um ponto por momento em que ela muda.
+# Num mesmo instante os fins são aplicados antes dos inícios, então uma sessão que
+# começa quando outra termina não conta em dobro.
+def ocupacao(sessoes):
+    if sessoes.empty:
+        return pd.DataFrame({'Momento': pd.Series(dtype='datetime64[ns]'), 'Ocupação': pd.Series(dtype='int64')})
+    inicios = sessoes['Início'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    fins = sessoes['Fim'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    momentos = np.r_[fins, inicios]
+    variacoes = np.r_[np.full(len(fins), -1), np.ones(len(inicios), dtype=np.int64)]
+    ordem = np.lexsort((variacoes, momentos))
+    momentos, nivel = momentos[ordem], np.cumsum(variacoes[ordem])
+    # Mantém só o último nível de cada momento
+    ultimo = np.r_[momentos[1:] != momentos[:-1], True]
+    return pd.DataFrame({'Momento': momentos[ultimo].astype('datetime64[ns]'), 'Ocupação': nivel[ultimo]})
+
+
+FREQUENCIAS_LINHA_DO_TEMPO = ['5min', '15min', '30min', '1h', '3h', '1D']
+MAX_PONTOS_LINHA_DO_TEMPO = 3000
+
+
+# Amostra a função degrau nos instantes de uma grade regular, para o gráfico da linha
+# do tempo: O(m log n) para m pontos da grade. Sem `frequencia`, usa a menor que
+# mantém o gráfico com até MAX_PONTOS_LINHA_DO_TEMPO pontos.
+def amostrar(degraus, inicio, fim, frequencia=None):
+    if frequencia is None:
+        duracao = pd.Timestamp(fim) - pd.Timestamp(inicio)
+        frequencia = next(
+            (f for f in FREQUENCIAS_LINHA_DO_TEMPO if duracao / pd.Timedelta(f) <= MAX_PONTOS_LINHA_DO_TEMPO),
+            FREQUENCIAS_LINHA_DO_TEMPO[-1],
+        )
+    grade = pd.date_range(inicio, fim, freq=frequencia)
+    if degraus.empty:
+        return pd.Series(0, index=grade, name='Ocupação')
+    momentos = degraus['Momento'].to_numpy(dtype='datetime64[ns]')
+    posicoes = np.searchsorted(momentos, grade.to_numpy(dtype='datetime64[ns]'), side='right') - 1
+    valores = np.where(posicoes >= 0, degraus['Ocupação'].to_numpy()[np.maximum(posicoes, 0)], 0)
+    return pd.Series(valores, index=grade, name='Ocupação')
+
+
+# Fração do período [inicio, fim] em que cada máquina esteve em uso
+def utilizacao_por_maquina(sessoes, inicio, fim):
+    if sessoes.empty:
+        return pd.DataFrame(columns=['Máquina', 'Horas em Uso', 'Utilização (%)'])
+    inicio_ns = np.datetime64(pd.Timestamp(inicio), 'ns')
+    fim_ns = np.datetime64(pd.Timestamp(fim), 'ns')
+    comeco = np.maximum(sessoes['Início'].to_numpy(dtype='datetime64[ns]'), inicio_ns)
+    termino = np.minimum(sessoes['Fim'].to_numpy(dtype='datetime64[ns]'), fim_ns)
+    segundos = np.clip((termino - comeco) / np.timedelta64(1, 's'), 0, None)
+    horas = pd.Series(segundos, index=sessoes['Nome da Máquina'].to_numpy()).groupby(level=0).sum() / 3600
+    total_horas = (fim_ns - inicio_ns) / np.timedelta64(1, 'h')
+    resultado = pd.DataFrame({
+        'Máquina': horas.index,
+        'Horas em Uso': horas.round(2).to_numpy(),
+        'Utilização (%)': (100 * horas / total_horas).round(1).to_numpy() if total_horas > 0 else 0.0,
+    })
+    return resultado.sort_values(by='Horas em Uso', ascending=False, ignore_index=True)
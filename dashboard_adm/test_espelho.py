@@ -0,0 +1,36 @@
+# Uma recarga completa interrompida no meio não pode deixar o estado.json apontando para
+# partições que já foram apagadas.
+import os
+import pandas as pd
+import pytest
+from espelho import EspelhoLogs
+
+CABECALHO = ["Timestamp", "Nome Aluno"]
+
+
+def logins(*datas):
+    return pd.DataFrame({"Timestamp": pd.to_datetime(list(datas)), "Nome Aluno": [f"Aluno {i}" for i in range(len(datas))]})
+
+
+def test_reescrever_substitui_as_particoes(tmp_path):
+    espelho = EspelhoLogs(str(tmp_path))
+    espelho.anexar(logins("2024-01-05", "2024-02-05"), CABECALHO, 3, 3)
+    espelho.reescrever(logins("2024-03-05"), CABECALHO, 2, 2)
+
+    cabecalho, linhas_lidas, _, df = espelho.carregar()
+    assert linhas_lidas == 2
+    assert df["Timestamp"].tolist() == [pd.Timestamp("2024-03-05")]
+    assert sorted(os.listdir(tmp_path)) == ["estado.json", "mes=2024-03"]
+
+
+def test_reescrever_interrompido_invalida_o_estado(tmp_path, monkeypatch):
+    espelho = EspelhoLogs(str(tmp_path))
+    espelho.anexar(logins("2024-01-05", "2024-02-05"), CABECALHO, 3, 3)
+
+    def falhar(*args):
+        raise OSError("interrompido")
+    monkeypatch.setattr(os, "rename", falhar)
+    with pytest.raises(OSError):
+        espelho.reescrever(logins("2024-03-05"), CABECALHO, 2, 2)
+
+    assert espelho.carregar() is None
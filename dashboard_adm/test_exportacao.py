@@ -0,0 +1,42 @@
+# O botão de download recebe o retorno de exportar() e o converte com a mesma função
+# do Streamlit; um tipo que ela não aceita quebra a exportação em todo clique.
+import io
+import gzip
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+from exportacao import exportar, FORMATOS_EXPORTACAO
+
+CABECALHO = ["Timestamp", "Nome Aluno", "Nome da Máquina", "ID Registro"]
+
+
+def lotes():
+    yield pd.DataFrame({"Timestamp": pd.to_datetime(["2024-01-01 10:00:00"]), "Nome Aluno": ["Ana"],
+                        "Nome da Máquina": ["PC-01"]})
+    yield pd.DataFrame({"Timestamp": pd.to_datetime(["2024-02-01 10:00:00"]), "Nome Aluno": ["Bia"],
+                        "Nome da Máquina": ["PC-02"], "ID Registro": ["id2"]})
+
+
+def baixar(formato):
+    gerar = lambda: exportar(lotes(), formato, CABECALHO)
+    dados, _ = convert_data_to_bytes_and_infer_mime(gerar(), RuntimeError("tipo não aceito"))
+    return dados
+
+
+@pytest.mark.parametrize("formato", sorted(FORMATOS_EXPORTACAO))
+def test_exportacao_aceita_pelo_download_button(formato):
+    assert baixar(formato)
+
+
+def test_csv_tem_as_colunas_do_cabecalho():
+    linhas = gzip.decompress(baixar("csv")).decode("utf-8").splitlines()
+    assert linhas == [
+        ",".join(CABECALHO), "01/01/2024 10:00:00,Ana,PC-01,", "01/02/2024 10:00:00,Bia,PC-02,id2",
+    ]
+
+
+def test_parquet_tem_as_colunas_do_cabecalho():
+    df = pq.read_table(io.BytesIO(baixar("parquet"))).to_pandas()
+    assert list(df.columns) == CABECALHO
+    assert df["ID Registro"].tolist() == [None, "id2"]
@@ -0,0 +1,123 @@
+# Teste de carga sem a API do Google: vários quiosques simulados registram logins em
+# uma planilha local enquanto o leitor do dashboard acompanha a aba 'Logs'.
+#
+# Uso:
+#   python teste_carga.py --clientes 200 --logins 5 --latencia-ms 300 --variacao-ms 200
+#   python teste_carga.py --backend sqlite --sqlite carga.sqlite3 --clientes 100
+#
+# Cada quiosque simulado usa o RegistroAcessos do aplicativo do aluno
+# (usuario/registro.py), o mesmo código do register_log: a leitura de 'Maquinas', os
+# anexos em 'Logs' e 'acessos_filtrados' e a gravação da linha da máquina na aba
+# 'ultimo_acesso'. As mensagens do registro são descartadas durante a carga.
+# No fim, são mostrados a vazão, a latência dos registros e se o leitor do dashboard
+# recebeu todas as linhas.
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "compartilhado"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "usuario"))
+from planilha_local import PlanilhaMemoria, PlanilhaSQLite
+from registro import (
+    RegistroAcessos, preparar_abas_registro, LOG_WORKSHEET_NAME, MACHINES_WORKSHEET_NAME, LAST_ACCESS_WORKSHEET_NAME,
+    LOG_TIME_FORMAT,
+)
+from ingestao import LeitorLogsIncremental, COLUNAS_LOGS
+
+
+# Abas do aplicativo do aluno, com `maquinas` apelidos em 'Maquinas'. A aba
+# 'ultimo_acesso' já recebe uma linha por máquina: no uso real cada máquina tem um só
+# quiosque, e aqui vários quiosques simulados dividem a mesma máquina.
+def preparar(planilha, maquinas):
+    existentes = preparar_abas_registro(planilha)
+    if MACHINES_WORKSHEET_NAME not in existentes:
+        planilha.worksheet(MACHINES_WORKSHEET_NAME).append_rows(
+            [["Hostname", "Apelido"]] + [[f"HOST-{i:03d}", f"PC-{i + 1:03d}"] for i in range(maquinas)]
+        )
+    if LAST_ACCESS_WORKSHEET_NAME not in existentes:
+        planilha.worksheet(LAST_ACCESS_WORKSHEET_NAME).append_rows(
+            [[f"PC-{i + 1:03d}", "", "", ""] for i in range(maquinas)]
+        )
+
+
+# Um login do quiosque `cliente`, enviado como um lote de um acesso (como na thread de
+# registro); retorna a duração do registro em segundos
+def registrar(planilha, registro, cliente, maquinas):
+    acesso = {
+        "id": uuid.uuid4().hex,
+        "usuario": {
+            "nome": f"Aluno {cliente:05d}", "email": f"aluno{cliente:05d}@escola.pr.gov.br",
+            "escola": "ESCOLA MUNICIPAL 1",
+        },
+        "hostname": f"HOST-{cliente % maquinas:03d}",
+        "horario": datetime.now().strftime(LOG_TIME_FORMAT),
+    }
+    inicio = time.perf_counter()
+    registro.registrar(planilha, [acesso])
+    return time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga com quiosques simulados e planilha local.")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--sqlite", default="teste_carga.sqlite3")
+    parser.add_argument("--clientes", type=int, default=100)
+    parser.add_argument("--logins", type=int, default=5, help="logins por quiosque")
+    parser.add_argument("--maquinas", type=int, default=40)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--variacao-ms", type=float, default=0)
+    parser.add_argument("--intervalo-leitor", type=float, default=1.0, help="segundos entre leituras do dashboard")
+    args = parser.parse_args(argv)
+
+    opcoes = {"latencia_ms": args.latencia_ms, "variacao_ms": args.variacao_ms}
+    planilha = PlanilhaSQLite(args.sqlite, **opcoes) if args.backend == "sqlite" else PlanilhaMemoria(**opcoes)
+    preparar(planilha, args.maquinas)
+    linhas_iniciais = len(planilha.worksheet(LOG_WORKSHEET_NAME).get_all_values()) - 1
+
+    leitor = LeitorLogsIncremental(planilha.worksheet(LOG_WORKSHEET_NAME), colunas_lidas=COLUNAS_LOGS)
+    parar = threading.Event()
+    leituras = []
+
+    def acompanhar():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            leitor.atualizar()
+            leituras.append(time.perf_counter() - inicio)
+            parar.wait(args.intervalo_leitor)
+
+    def quiosque(cliente):
+        registro = RegistroAcessos()
+        return [registrar(planilha, registro, cliente, args.maquinas) for _ in range(args.logins)]
+
+    thread_leitor = threading.Thread(target=acompanhar, daemon=True)
+    thread_leitor.start()
+    inicio = time.perf_counter()
+    with open(os.devnull, "w") as descarte, redirect_stdout(descarte):
+        with ThreadPoolExecutor(max_workers=args.clientes) as executor:
+            duracoes = np.concatenate(list(executor.map(quiosque, range(args.clientes))))
+    segundos = time.perf_counter() - inicio
+    parar.set()
+    thread_leitor.join()
+    leitor.atualizar()
+
+    esperadas = linhas_iniciais + len(duracoes)
+    p50, p95, p99 = np.percentile(duracoes, [50, 95, 99])
+    print(f"{args.clientes} quiosques x {args.logins} logins ({args.backend}, latência {args.latencia_ms:g} ms"
+          f" + até {args.variacao_ms:g} ms)")
+    print(f"  {len(duracoes)} registros em {segundos:.2f} s: {len(duracoes) / segundos:.1f} registros/s")
+    print(f"  latência do registro: p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms")
+    if leituras:
+        print(f"  leitor do dashboard: {len(leituras)} leituras, máximo {max(leituras) * 1000:.0f} ms")
+    print(f"  linhas lidas pelo dashboard: {leitor.linhas_lidas} de {esperadas}"
+          + ("" if leitor.linhas_lidas == esperadas else "  <-- divergência"))
+    return 0 if leitor.linhas_lidas == esperadas else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+import os
+import json
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+JANELA_MINUTOS = 60
+MAX_USUARIOS_POR_MAQUINA = 2
+CAMINHO_REGRAS = os.getenv("REGRAS_PATH") or "regras.json"
+CAMINHO_CRONOGRAMA = os.getenv("CRONOGRAMA_PATH") or "cronograma.json"
+
+
+# Conta, para cada login, quantos valores distintos de `coluna_valor` aparecem no mesmo
+# `coluna_grupo` nos `janela_minutos` anteriores (janela fechada [ts - janela, ts]).
+# Retorna um array alinhado com as linhas de `df`; linhas sem grupo ou sem Timestamp
+# ficam com 0, como na regra original. Se `df` já estiver ordenado por Timestamp, a
+# reordenação por grupo é só uma ordenação estável dos códigos inteiros.
+def contar_distintos_na_janela(df, coluna_grupo, coluna_valor, janela_minutos, ordenado_por_tempo=False):
+    n = len(df)
+    contagem = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return contagem
+
+    cod_grupo, _ = pd.factorize(df[coluna_grupo])
+    cod_valor, _ = pd.factorize(df[coluna_valor])
+    ts = df['Timestamp']
+    validos = (cod_grupo >= 0) & ts.notna().to_numpy()
+    if not validos.any():
+        return contagem
+
+    posicoes = np.flatnonzero(validos)
+    grupo = cod_grupo[posicoes]
+    valor = cod_valor[posicoes]
+    tempo = ts.to_numpy(dtype='datetime64[ns]')[posicoes].astype(np.int64)
+
+    # Ordena por (grupo, Timestamp); a ordem estável mantém empates na ordem original
+    if ordenado_por_tempo:
+        ordem = np.argsort(grupo, kind='stable')
+    else:
+        ordem = np.lexsort((tempo, grupo))
+    grupo, valor, tempo = grupo[ordem], valor[ordem], tempo[ordem]
+    m = len(ordem)
+
+    # Limites [esq, dir] da janela de cada login, restritos ao bloco do seu grupo
+    janela_ns = np.int64(janela_minutos) * 60 * 10**9
+    inicios = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+    fins = np.r_[inicios[1:], m]
+    esq = np.empty(m, dtype=np.int64)
+    dir_ = np.empty(m, dtype=np.int64)
+    for ini, fim in zip(inicios, fins):
+        bloco = tempo[ini:fim]
+        esq[ini:fim] = ini + np.searchsorted(bloco, bloco - janela_ns, side='left')
+        dir_[ini:fim] = ini + np.searchsorted(bloco, bloco, side='right') - 1
+
+    # Ocorrência anterior do mesmo valor no mesmo grupo (-1 se não houver)
+    anterior = np.full(m, -1, dtype=np.int64)
+    com_valor = np.flatnonzero(valor >= 0)
+    if len(com_valor):
+        chave = grupo[com_valor].astype(np.int64) * (valor.max() + 1) + valor[com_valor]
+        ordem_chave = np.argsort(chave, kind='stable')
+        chave_ord = chave[ordem_chave]
+        mesmo = np.r_[False, chave_ord[1:] == chave_ord[:-1]]
+        pos_ord = com_valor[ordem_chave]
+        anterior[pos_ord[mesmo]] = pos_ord[np.flatnonzero(mesmo) - 1]
+
+    # O login k conta como valor distinto para toda janela i com esq[i] <= k <= dir[i]
+    # e anterior[k] < esq[i]. Como esq e dir são monótonos, essas janelas formam um
+    # intervalo contíguo de i, somado com um array de diferenças.
+    k = com_valor
+    de = np.maximum(np.searchsorted(esq, anterior[k], side='right'),
+                    np.searchsorted(dir_, k, side='left'))
+    ate = np.searchsorted(esq, k, side='right')
+    ok = de < ate
+    diferencas = np.bincount(de[ok], minlength=m + 1) - np.bincount(ate[ok], minlength=m + 1)
+    distintos = np.cumsum(diferencas[:m])
+
+    resultado = np.empty(m, dtype=np.int64)
+    resultado[ordem] = distintos
+    contagem[posicoes] = resultado
+    return contagem
+
+
+# Alunos distintos por máquina, a contagem usada pela regra original
+def contar_usuarios_na_janela(df, janela_minutos=JANELA_MINUTOS):
+    return contar_distintos_na_janela(df, 'Nome da Máquina', 'Nome Aluno', janela_minutos)
+
+#Retorna logins que violaram a regra: >2 usuários únicos por máquina em 60 minutos
+def encontrar_violacoes(df):
+    if df.empty or 'Timestamp' not in df.columns:
+        return pd.DataFrame()
+    usuarios_unicos = contar_usuarios_na_janela(df)
+    mascara = usuarios_unicos > MAX_USUARIOS_POR_MAQUINA
+    if not mascara.any():
+        return pd.DataFrame()
+    violacoes = df[mascara].copy()
+    violacoes['Motivo'] = [f'{n} usuários únicos na última hora' for n in usuarios_unicos[mascara]]
+    return violacoes.drop_duplicates()
+
+
+# --- Regras ---
+# Toda regra guarda em `violacoes` o motivo de cada linha (índice) que a violou.
+# avaliar_lote(df) reavalia as linhas de `df` (já ordenado por Timestamp). Regras com
+# `incremental = True` também aceitam processar(indice, ts, linha) para um login novo
+# por vez e concluir_lote(df) ao fim de cada lote.
+
+# Mais de `maximo` valores distintos de `coluna_valor` no mesmo `coluna_grupo` em
+# `janela_minutos`. Para cada grupo mantém a janela atual como uma deque de
+# (timestamp, valor, índice) e a contagem de logins por valor dentro dela.
+class RegraDistintosNaJanela:
+    incremental = True
+
+    def __init__(self, nome, coluna_grupo, coluna_valor, maximo, janela_minutos, motivo, descricao=''):
+        self.nome = nome
+        self.coluna_grupo = coluna_grupo
+        self.coluna_valor = coluna_valor
+        self.maximo = maximo
+        self.janela_minutos = janela_minutos
+        self.motivo = motivo
+        self.descricao = descricao
+        self.colunas = [coluna_grupo, coluna_valor]
+        self._janela_ns = np.int64(janela_minutos) * 60 * 10**9
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.violacoes = {}
+        self._janelas = {}
+        self._contagens = {}
+        self._fora_de_ordem = set()
+
+    def motivo_para(self, n):
+        return self.motivo.format(n=n, janela=self.janela_minutos)
+
+    def avaliar_lote(self, df):
+        validos = df[df[self.coluna_grupo].notna()]
+        if validos.empty:
+            return
+        distintos = contar_distintos_na_janela(validos, self.coluna_grupo, self.coluna_valor,
+                                               self.janela_minutos, ordenado_por_tempo=True)
+        if self.violacoes:
+            for indice in validos.index:
+                self.violacoes.pop(indice, None)
+        mascara = distintos > self.maximo
+        self.violacoes.update(
+            (indice, self.motivo_para(n)) for indice, n in zip(validos.index[mascara], distintos[mascara].tolist())
+        )
+
+        # Reconstrói a janela de cada grupo a partir dos seus logins mais recentes
+        grupos = validos[self.coluna_grupo]
+        codigos, valores_grupo = pd.factorize(grupos)
+        tempos = validos['Timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        ultimo_por_grupo = np.full(len(valores_grupo), np.iinfo(np.int64).min)
+        np.maximum.at(ultimo_por_grupo, codigos, tempos)
+        recentes = tempos >= ultimo_por_grupo[codigos] - self._janela_ns
+        for grupo in valores_grupo:
+            self._janelas[grupo] = deque()
+            self._contagens[grupo] = {}
+        for indice, ts, grupo, valor in zip(validos.index[recentes], tempos[recentes], grupos.to_numpy()[recentes],
+                                            validos[self.coluna_valor].to_numpy()[recentes]):
+            valor = None if pd.isna(valor) else valor
+            self._janelas[grupo].append((ts, valor, indice))
+            if valor is not None:
+                contagem = self._contagens[grupo]
+                contagem[valor] = contagem.get(valor, 0) + 1
+
+    def processar(self, indice, ts, linha):
+        grupo = linha[self.coluna_grupo]
+        if pd.isna(grupo) or grupo in self._fora_de_ordem:
+            return
+        janela = self._janelas.setdefault(grupo, deque())
+        if janela and ts < janela[-1][0]:
+            self._fora_de_ordem.add(grupo)
+            return
+        valor = linha[self.coluna_valor]
+        valor = None if pd.isna(valor) else valor
+        contagem = self._contagens.setdefault(grupo, {})
+        limite = ts - self._janela_ns
+        while janela and janela[0][0] < limite:
+            _, antigo, _ = janela.popleft()
+            if antigo is not None:
+                contagem[antigo] -= 1
+                if not contagem[antigo]:
+                    del contagem[antigo]
+        janela.append((ts, valor, indice))
+        if valor is not None:
+            contagem[valor] = contagem.get(valor, 0) + 1
+
+        distintos = len(contagem)
+        if distintos > self.maximo:
+            motivo = self.motivo_para(distintos)
+            # Logins com o mesmo Timestamp compartilham a mesma janela
+            for ts_anterior, _, indice_anterior in reversed(janela):
+                if ts_anterior != ts:
+                    break
+                self.violacoes[indice_anterior] = motivo
+
+    # Logins que chegaram fora de ordem fazem o grupo ser recalculado por inteiro
+    def concluir_lote(self, df):
+        if self._fora_de_ordem:
+            grupos, self._fora_de_ordem = self._fora_de_ordem, set()
+            afetados = df[df[self.coluna_grupo].isin(grupos) & df['Timestamp'].notna()]
+            self.avaliar_lote(afetados.sort_index().sort_values(by='Timestamp', kind='stable'))
+
+
+# Logins fora de todos os horários do cronograma (mesmo formato do cronograma.json da
+# aplicação do aluno). Com `verificar_escola`, o horário precisa ser da escola do login.
+class RegraForaDoCronograma:
+    incremental = False
+
+    def __init__(self, nome, cronograma, verificar_escola=True, motivo='Login fora do horário do cronograma', descricao=''):
+        self.nome = nome
+        self.verificar_escola = verificar_escola
+        self.motivo = motivo
+        self.descricao = descricao
+        self.colunas = ['Escola'] if verificar_escola else []
+        self.horarios = [
+            (DIAS_SEMANA[item['dia']], _segundos(item['inicio']), _segundos(item['fim']), str(item.get('escola', '')).strip())
+            for item in cronograma
+        ]
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.violacoes = {}
+
+    def avaliar(self, df):
+        ts = df['Timestamp']
+        dia = ts.dt.weekday.to_numpy()
+        segundos = (ts.dt.hour * 3600 + ts.dt.minute * 60 + ts.dt.second).to_numpy()
+        if self.verificar_escola:
+            # Compara os nomes distintos uma vez e depois só os códigos de cada linha
+            codigos, escolas = pd.factorize(df['Escola'])
+            escolas = pd.Index(escolas.astype(str)).str.strip()
+        permitido = np.zeros(len(df), dtype=bool)
+        for dia_semana, inicio, fim, escola_horario in self.horarios:
+            no_horario = (dia == dia_semana) & (segundos >= inicio) & (segundos <= fim)
+            if self.verificar_escola:
+                no_horario &= np.isin(codigos, np.flatnonzero(escolas == escola_horario))
+            permitido |= no_horario
+        return df.index[~permitido]
+
+    def avaliar_lote(self, df):
+        for indice in df.index:
+            self.violacoes.pop(indice, None)
+        self.violacoes.update((indice, self.motivo) for indice in self.avaliar(df))
+
+
+DIAS_SEMANA = {
+    "Segunda-feira": 0, "Terça-feira": 1, "Quarta-feira": 2,
+    "Quinta-feira": 3, "Sexta-feira": 4, "Sábado": 5, "Domingo": 6,
+}
+
+
+def _segundos(hora):
+    horas, minutos = hora.split(':')
+    return int(horas) * 3600 + int(minutos) * 60
+
+
+def regra_usuarios_por_maquina(maximo=MAX_USUARIOS_POR_MAQUINA, janela_minutos=JANELA_MINUTOS, motivo=None):
+    if motivo is None:
+        motivo = '{n} usuários únicos na última hora' if janela_minutos == 60 else '{n} usuários únicos em {janela} minutos'
+    return RegraDistintosNaJanela(
+        'Contas por máquina', 'Nome da Máquina', 'Nome Aluno', maximo, janela_minutos, motivo,
+        descricao=f'no máximo {maximo} contas diferentes por máquina em {janela_minutos} minutos',
+    )
+
+
+def regra_maquinas_por_aluno(maximo=1, janela_minutos=35, motivo='{n} máquinas diferentes em {janela} minutos'):
+    return RegraDistintosNaJanela(
+        'Aluno em várias máquinas', 'Nome Aluno', 'Nome da Máquina', maximo, janela_minutos, motivo,
+        descricao=f'cada aluno em no máximo {maximo} máquina(s) ao mesmo tempo (janela de {janela_minutos} minutos)',
+    )
+
+
+def regra_fora_do_cronograma(arquivo=None, verificar_escola=True, motivo='Login fora do horário do cronograma'):
+    arquivo = arquivo or CAMINHO_CRONOGRAMA
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        cronograma = json.load(f)
+    return RegraForaDoCronograma(
+        'Fora do cronograma', cronograma, verificar_escola, motivo,
+        descricao='logins apenas nos horários do cronograma' + (' da escola' if verificar_escola else ''),
+    )
+
+
+TIPOS_DE_REGRA = {
+    'usuarios_por_maquina': regra_usuarios_por_maquina,
+    'maquinas_por_aluno': regra_maquinas_por_aluno,
+    'fora_do_cronograma': regra_fora_do_cronograma,
+}
+
+
+# Lê as regras de um arquivo JSON (lista de objetos com "tipo" e os parâmetros da
+# regra). Sem o arquivo, vale só a regra original de contas por máquina.
+def carregar_regras(caminho=None):
+    caminho = caminho or CAMINHO_REGRAS
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            configuracao = json.load(f)
+    except FileNotFoundError:
+        return [regra_usuarios_por_maquina()]
+    regras = []
+    for item in configuracao:
+        parametros = dict(item)
+        tipo = parametros.pop('tipo', None)
+        if tipo not in TIPOS_DE_REGRA:
+            raise ValueError(f"Tipo de regra desconhecido em '{caminho}': {tipo}")
+        regras.append(TIPOS_DE_REGRA[tipo](**parametros))
+    return regras
+
+
+# Quantos minutos antes de um período as regras precisam enxergar para avaliá-lo
+def minutos_de_contexto(regras):
+    return max((getattr(regra, 'janela_minutos', 0) for regra in regras), default=0)
+
+
+# --- Motor ---
+
+# Avalia todas as regras juntas sobre os logs, mantendo o estado entre atualizações.
+# As linhas novas (índice a partir do último ponto de controle) são ordenadas uma vez
+# por Timestamp e percorridas uma única vez, alimentando todas as regras incrementais;
+# na primeira carga cada regra usa a versão vetorizada sobre a mesma ordenação.
+class DetectorViolacoes:
+    def __init__(self, regras=None):
+        self.regras = regras if regras is not None else [regra_usuarios_por_maquina()]
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.linhas_processadas = 0
+        for regra in self.regras:
+            regra.reiniciar()
+        self._ancora = None
+        self._resultado = pd.DataFrame()
+        self._alterado = True
+
+    # Confere se a última linha processada continua igual; se a planilha foi
+    # recarregada ou editada, o estado é descartado
+    def _ancora_confere(self, df):
+        if self._ancora is None:
+            return self.linhas_processadas == 0
+        indice, linha = self._ancora
+        return indice in df.index and df.loc[indice].equals(linha)
+
+    def atualizar(self, df):
+        with self._lock:
+            return self._atualizar(df)
+
+    def _atualizar(self, df):
+        if df.empty or 'Timestamp' not in df.columns:
+            self._reiniciar()
+            return pd.DataFrame()
+        if not self._ancora_confere(df):
+            self._reiniciar()
+
+        novos = df[df.index >= self.linhas_processadas]
+        if not novos.empty:
+            novos = novos[novos['Timestamp'].notna()].sort_index().sort_values(by='Timestamp', kind='stable')
+            if self.linhas_processadas == 0:
+                for regra in self.regras:
+                    regra.avaliar_lote(novos)
+            else:
+                self._processar(df, novos)
+            self._alterado = True
+            ultimo = int(df.index.max())
+            self.linhas_processadas = ultimo + 1
+            self._ancora = (ultimo, df.loc[ultimo].copy())
+
+        if self._alterado:
+            self._resultado = self._montar_resultado(df)
+            self._alterado = False
+        return self._resultado
+
+    def _processar(self, df, novos):
+        incrementais = [regra for regra in self.regras if regra.incremental]
+        for regra in self.regras:
+            if not regra.incremental:
+                regra.avaliar_lote(novos)
+        if not incrementais:
+            return
+
+        colunas = list(dict.fromkeys(c for regra in incrementais for c in regra.colunas))
+        tempos = novos['Timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        for indice, ts, *valores in zip(novos.index, tempos, *(novos[c] for c in colunas)):
+            linha = dict(zip(colunas, valores))
+            for regra in incrementais:
+                regra.processar(indice, ts, linha)
+        for regra in incrementais:
+            regra.concluir_lote(df)
+
+    def _montar_resultado(self, df):
+        partes = []
+        for regra in self.regras:
+            if not regra.violacoes:
+                continue
+            violacoes = df[df.index.isin(list(regra.violacoes))].copy()
+            violacoes['Regra'] = regra.nome
+            violacoes['Motivo'] = [regra.violacoes[i] for i in violacoes.index]
+            partes.append(violacoes)
+        if not partes:
+            return pd.DataFrame()
+        if len(partes) == 1:
+            return partes[0].drop_duplicates()
+        # Várias regras: mantém a ordem das linhas em `df`
+        resultado = pd.concat(partes)
+        posicoes = df.index.get_indexer(resultado.index)
+        return resultado.iloc[np.argsort(posicoes, kind='stable')].drop_duplicates()
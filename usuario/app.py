@@ -4,9 +4,17 @@ import time
 import json
 import os
 import socket
+import threading
 from datetime import datetime
 import gspread
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
+# planilha_local.py é compartilhado com o dashboard (no executável, entra pelo --paths do PyInstaller)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "compartilhado"))
+from planilha_local import BACKEND_ARMAZENAMENTO, abrir_planilha_local
+from diario_acessos import DiarioAcessos
+from registro import RegistroAcessos, preparar_abas_registro, LOG_TIME_FORMAT
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
@@ -24,8 +32,10 @@ CREDENTIALS_PATH = (
     or (os.path.join(os.path.dirname(sys.executable), 'credentials.json') if hasattr(sys, 'executable') else 'credentials.json')
 )
 SPREADSHEET_NAME = "contas_app"
-LOG_WORKSHEET_NAME = "Logs"
-MACHINES_WORKSHEET_NAME = "Maquinas"
+# Versão da lista de contas (célula A2), aumentada por quem edita a lista de contas
+ROSTER_VERSION_WORKSHEET_NAME = "versao_contas"
+# Colunas da lista de contas usadas pelo aplicativo ('name' é opcional)
+ROSTER_COLUMNS = ['full_name', 'email', 'senha', 'descescola', 'name']
 SESSION_DURATION_MINUTES = 35
 WARNING_SECONDS = 5
 SCOPE = ["https://spreadsheets.google.com/feeds", 'https://www.googleapis.com/auth/spreadsheets',
@@ -34,6 +44,24 @@ SCOPE = ["https://spreadsheets.google.com/feeds", 'https://www.googleapis.com/au
 load_dotenv()
 
 CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH") or "credentials.json"
+# Arquivos locais ficam ao lado do executável (ou deste arquivo)
+APP_DIR = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
+# Cópia local da lista de contas
+ROSTER_CACHE_PATH = os.getenv("ROSTER_CACHE_PATH") or os.path.join(APP_DIR, 'contas_cache.json')
+# A cópia local não guarda a coluna 'senha' (ver guardar_senhas)
+ROSTER_CACHE_VERSION = 3
+# Idade máxima da cópia local: depois disso a lista é baixada mesmo sem mudança de versão
+ROSTER_MAX_AGE_HOURS = float(os.getenv("ROSTER_MAX_AGE_HOURS") or 24)
+# Tempo máximo de espera pela senha lida na planilha no momento do login (ver aguardar_senha)
+PASSWORD_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_TIMEOUT_SECONDS") or 20)
+# Diário dos acessos ainda não enviados à planilha (ver diario_acessos.py)
+LOG_JOURNAL_PATH = os.getenv("LOG_JOURNAL_PATH") or os.path.join(APP_DIR, 'acessos_pendentes.jsonl')
+LOG_BATCH_SIZE = 50
+LOG_RETRY_MIN_SECONDS = 5
+LOG_RETRY_MAX_SECONDS = 300
+LOG_FLUSH_TIMEOUT_SECONDS = 30
+# Cópia local da aba 'ultimo_acesso' para as máquinas deste quiosque
+LAST_ACCESS_PATH = os.getenv("LAST_ACCESS_PATH") or os.path.join(APP_DIR, 'ultimo_acesso.json')
 
 def carregar_cronograma():
     # Carrega o cronograma a partir do arquivo json
@@ -53,13 +81,50 @@ def carregar_cronograma():
 
 # --- VARIÁVEIS GLOBAIS ---
 ALL_USERS = []
+# Usuários de cada turma, indexados por (escola, periodo, serie) e já ordenados por nome
+USERS_BY_CLASS = {}
+# Senhas da lista de contas ({email: senha}), só na memória do processo (ver guardar_senhas)
+PASSWORDS = {}
+# Usuários na ordem em que aparecem na lista de nomes (uma entrada por linha da Listbox)
+listed_users = []
 root = None
+name_list = None
+school_menu = period_menu = series_menu = None
+login_btn = None
+# Aviso de turma agendada fora da lista de contas (ver aplicar_horario)
+class_warning = None
 CRONOGRAMA = carregar_cronograma()
 
 # Variáveis globais para gspread
 gspread_creds = None
 gspread_client = None
 gspread_spreadsheet = None
+gspread_lock = threading.Lock()
+# Thread que prepara a planilha e atualiza a lista de contas depois que a janela abre
+sync_thread = None
+planilha_preparada = threading.Event()
+# Diário local dos acessos e a thread que os envia à planilha
+log_journal = None
+log_worker = None
+log_wakeup = threading.Event()
+log_stop = threading.Event()
+# Estado do registro dos acessos na planilha (ver registro.py), criado no primeiro envio
+log_writer = None
+
+def abrir_planilha():
+# Abre a planilha do backend configurado em STORAGE_BACKEND: o Google Sheets (padrão)
+# ou um substituto local ('sqlite' ou 'memory') com a mesma interface, para testes.
+    global gspread_creds, gspread_client, gspread_spreadsheet
+    with gspread_lock:
+        if gspread_spreadsheet is None:
+            if BACKEND_ARMAZENAMENTO != "sheets":
+                gspread_spreadsheet = abrir_planilha_local(BACKEND_ARMAZENAMENTO)
+                return gspread_spreadsheet
+            if gspread_client is None:
+                gspread_creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_PATH, SCOPE)
+                gspread_client = gspread.authorize(gspread_creds)
+            gspread_spreadsheet = gspread_client.open(SPREADSHEET_NAME)
+        return gspread_spreadsheet
 
 MAPA_DIAS = {
     0: "Segunda-feira", 1: "Terça-feira", 2: "Quarta-feira",
@@ -86,8 +151,22 @@ def verificar_horario_atual():
                 return agendamento 
     return None
 
+def aguardar_senha(password):
+# Retorna a senha; se ela ainda está sendo lida na planilha (um Future), espera no máximo
+# PASSWORD_TIMEOUT_SECONDS, para que uma falha de rede não trave o quiosque.
+    if not isinstance(password, Future):
+        return password
+    try:
+        return password.result(timeout=PASSWORD_TIMEOUT_SECONDS)
+    except FuturesTimeoutError:
+        raise TimeoutError(
+            f"A senha não foi lida na planilha em {PASSWORD_TIMEOUT_SECONDS:g} segundos. "
+            "Verifique a conexão com a internet e tente de novo."
+        )
+
 def perform_login(email, password):
-# Função para executar o processo de login e retornar a instância do driver.
+# Função para executar o processo de login e retornar a instância do driver. A senha pode
+# ser um Future (buscada na planilha enquanto o navegador abre).
     options = Options()
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     
@@ -101,7 +180,7 @@ def perform_login(email, password):
         driver.find_element(By.ID, 'identifierNext').click()
 
         password_field = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.XPATH, "//input[@type='password']")))
-        password_field.send_keys(password)
+        password_field.send_keys(aguardar_senha(password))
         driver.find_element(By.ID, 'passwordNext').click()
 
         print(f"Login com a conta '{email}' realizado com sucesso.")
@@ -111,162 +190,388 @@ def perform_login(email, password):
         driver.quit()
         return None
 
-def processar_acesso_filtrado(spreadsheet, user_data, machine_name, timestamp_atual):
-    try:
+def ler_colunas(spreadsheet, sheet, nomes):
+# Lê só as colunas `nomes` da aba: o cabeçalho e depois as colunas pedidas, em uma única
+# requisição e já organizadas por coluna. Retorna {nome: valores}, todas com o mesmo
+# tamanho; colunas que não existem no cabeçalho ficam de fora.
+    cabecalho = sheet.row_values(1)
+    posicoes = {nome: cabecalho.index(nome) + 1 for nome in nomes if nome in cabecalho}
+    letras = [rowcol_to_a1(1, posicao)[:-1] for posicao in posicoes.values()]
+    resposta = spreadsheet.values_batch_get(
+        [absolute_range_name(sheet.title, f"{letra}2:{letra}") for letra in letras],
+        params={'majorDimension': 'COLUMNS'},
+    )
+    colunas = [(faixa.get('values') or [[]])[0] for faixa in resposta.get('valueRanges', [])]
+    total = max((len(coluna) for coluna in colunas), default=0)
+    return {nome: coluna + [''] * (total - len(coluna)) for nome, coluna in zip(posicoes, colunas)}
+
+def obter_registro():
+    global log_writer
+    if log_writer is None:
+        log_writer = RegistroAcessos(LAST_ACCESS_PATH, origem_contas())
+    return log_writer
+
+def register_log(acessos, verificar_ids=False):
+# Envia à planilha um lote de acessos do diário (ver RegistroAcessos.registrar), depois
+# que as abas de registro existem. Falhas de rede são propagadas para que o lote continue
+# pendente no diário.
+    aguardar_preparacao()
+    obter_registro().registrar(abrir_planilha(), acessos, verificar_ids)
+
+def obter_diario():
+    global log_journal
+    if log_journal is None:
+        log_journal = DiarioAcessos(LOG_JOURNAL_PATH)
+    return log_journal
+
+def iniciar_registros():
+# Inicia a thread de registro (uma vez por execução). Ela começa enviando o que ficou
+# pendente no diário em execuções anteriores.
+    global log_worker
+    if log_worker is None:
+        log_worker = threading.Thread(target=processar_registros, args=(obter_diario(),), daemon=True)
+        log_worker.start()
+
+def registrar_acesso(user_data):
+# Grava o acesso no diário local e avisa a thread de registro, que o envia à planilha em
+# segundo plano; o navegador abre sem esperar pela rede. O horário é o do clique.
+    obter_diario().registrar({
+        'usuario': {'nome': user_data['nome'], 'email': user_data['email'], 'escola': user_data['escola']},
+        'hostname': socket.gethostname(),
+        'horario': datetime.now().strftime(LOG_TIME_FORMAT),
+    })
+    iniciar_registros()
+    log_wakeup.set()
+
+def processar_registros(diario):
+# Thread de registro: envia os acessos pendentes do diário em lotes de até LOG_BATCH_SIZE,
+# na ordem em que aconteceram. Após uma falha, tenta de novo com espera crescente (ou
+# antes, se chegar um acesso novo). Termina quando log_stop é sinalizado e não há mais
+# pendentes, ou na primeira falha depois disso: o que sobrar fica para a próxima execução.
+    incertos = {acesso['id'] for acesso in diario.pendentes()}
+    espera = LOG_RETRY_MIN_SECONDS
+    while True:
+        lote = diario.pendentes(LOG_BATCH_SIZE)
+        if not lote:
+            if log_stop.is_set():
+                return
+            log_wakeup.wait()
+            log_wakeup.clear()
+            continue
+        ids = [acesso['id'] for acesso in lote]
         try:
-            worksheet = spreadsheet.worksheet("acessos_filtrados")
-        except gspread.exceptions.WorksheetNotFound:
-            worksheet = spreadsheet.add_worksheet(title="acessos_filtrados", rows="1000", cols="1")
-            worksheet.append_row(["Registro de Acesso Significativo"])
+            register_log(lote, verificar_ids=any(id_acesso in incertos for id_acesso in ids))
+        except Exception as e:
+            print(f"ERRO AO REGISTRAR O LOG ({len(lote)} acesso(s) continuam pendentes): {e}")
+            incertos.update(ids)
+            if log_stop.is_set():
+                return
+            log_wakeup.wait(espera)
+            log_wakeup.clear()
+            espera = min(espera * 2, LOG_RETRY_MAX_SECONDS)
+            continue
+        diario.confirmar(ids)
+        incertos.difference_update(ids)
+        espera = LOG_RETRY_MIN_SECONDS
+
+def finalizar_registros():
+# Dá à thread de registro até LOG_FLUSH_TIMEOUT_SECONDS para enviar os acessos pendentes.
+# Chamada no fim do programa (inclusive após o sys.exit de manage_session); não pode ficar
+# para o atexit, quando o ThreadPoolExecutor de anexar_linhas já não aceita tarefas. O que
+# não for enviado continua no diário.
+    if log_worker is not None and log_worker.is_alive():
+        if obter_diario().pendentes(1):
+            print("Aguardando o registro dos acessos pendentes...")
+        log_stop.set()
+        log_wakeup.set()
+        log_worker.join(LOG_FLUSH_TIMEOUT_SECONDS)
+
+def montar_usuarios(colunas):
+# Converte as colunas da lista de contas ({coluna: valores}) na lista de usuários do aplicativo.
+# O 'id' de cada usuário é a linha dele na planilha, único mesmo entre alunos de mesmo nome.
+# As senhas não entram nos usuários (ver guardar_senhas).
+    usuarios = []
+    turmas = colunas.get('name') or [''] * len(colunas['full_name'])
+    for linha, (nome, email, escola, turma) in enumerate(zip(
+        colunas['full_name'], colunas['email'], colunas['descescola'], turmas
+    ), start=2):
+        new_row = {'id': linha, 'nome': nome, 'email': email, 'escola': escola.strip()}
+        column_name = turma.strip()
+        if ' - ' in column_name:
+            parts = column_name.split(' - ', 1)
+            new_row['serie'] = parts[0].strip()
+            new_row['periodo'] = parts[1].strip()
+        else:
+            new_row['serie'] = column_name; new_row['periodo'] = ''
+        usuarios.append(new_row)
+    return usuarios
+
+def indexar_turmas(usuarios):
+# Agrupa os usuários por (escola, periodo, serie) em uma única passada e ordena cada turma
+# por nome uma vez. Cada turma vira (rótulos, usuários), duas listas na ordem da Listbox;
+# alunos da mesma turma com o mesmo nome aparecem com o e-mail no rótulo.
+    turmas = {}
+    for user in usuarios:
+        turmas.setdefault((user['escola'], user['periodo'], user['serie']), []).append(user)
+    indice = {}
+    for chave, membros in turmas.items():
+        membros.sort(key=lambda u: (u['nome'], u['id']))
+        repetidos = {u['nome'] for u, proximo in zip(membros, membros[1:]) if u['nome'] == proximo['nome']}
+        rotulos = [f"{u['nome']} ({u['email']})" if u['nome'] in repetidos else u['nome'] for u in membros]
+        indice[chave] = (rotulos, membros)
+    return indice
+
+def definir_usuarios(usuarios):
+# Troca a lista de usuários e o índice por turma juntos.
+    global ALL_USERS, USERS_BY_CLASS
+    USERS_BY_CLASS = indexar_turmas(usuarios)
+    ALL_USERS = usuarios
+
+def guardar_senhas(colunas):
+# Guarda as senhas das colunas da lista de contas ({email: senha}) só na memória do
+# processo: elas nunca vão para o disco do quiosque, ao alcance dos alunos. Preenchidas ao
+# baixar a lista ou pela conferência em segundo plano, para que o login não dependa de uma
+# leitura da planilha.
+    global PASSWORDS
+    PASSWORDS = dict(zip(colunas.get('email', []), colunas.get('senha', [])))
+
+def origem_contas():
+# Identifica de onde veio a lista de contas, para não usar a cópia local de outra planilha.
+    return SPREADSHEET_NAME if BACKEND_ARMAZENAMENTO == "sheets" else BACKEND_ARMAZENAMENTO
+
+def ler_cache_contas():
+# Retorna a cópia local da lista de contas ({'versao_contas', 'baixado_em', 'colunas', ...}) ou None se ela
+# não existir, estiver ilegível, for de outra versão do formato ou de outra planilha.
+    try:
+        with open(ROSTER_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if cache.get('versao') != ROSTER_CACHE_VERSION or cache.get('origem') != origem_contas():
+        return None
+    if not cache.get('colunas', {}).get('full_name'):
+        return None
+    return cache
+
+def sem_senhas(colunas):
+    return {nome: valores for nome, valores in colunas.items() if nome != 'senha'}
+
+def gravar_cache_contas(versao_contas, colunas):
+# Grava a cópia local em um arquivo temporário e o substitui de uma vez, para que uma
+# interrupção no meio da gravação não deixe uma cópia pela metade. As senhas não são
+# gravadas: o arquivo fica no quiosque, ao alcance dos alunos.
+    cache = {
+        'versao': ROSTER_CACHE_VERSION, 'origem': origem_contas(), 'versao_contas': versao_contas,
+        'baixado_em': datetime.now().isoformat(timespec='seconds'), 'colunas': sem_senhas(colunas),
+    }
+    temporario = ROSTER_CACHE_PATH + '.tmp'
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(temporario, ROSTER_CACHE_PATH)
+    except OSError as e:
+        print(f"Não foi possível gravar a cópia local da lista de contas: {e}")
+    return cache
+
+def ler_versao_contas(spreadsheet):
+# Versão da lista de contas (uma célula), ou None se a aba de versão não existir ou estiver vazia.
+    try:
+        valores = spreadsheet.values_get(absolute_range_name(ROSTER_VERSION_WORKSHEET_NAME, 'A2')).get('values')
+    except (gspread.exceptions.APIError, gspread.exceptions.WorksheetNotFound):
+        return None
+    return valores[0][0] if valores and valores[0] else None
 
-        registros = worksheet.get_all_values()
-        
-        ultimo_registro_da_maquina = None
-        for registro in reversed(registros):
-            if machine_name in registro[0]:
-                ultimo_registro_da_maquina = registro[0]
-                break
-        
-        if ultimo_registro_da_maquina is None:
-            print(f"Primeiro acesso registrado para a máquina {machine_name}.")
-            novo_registro = f"{user_data['nome']} acessou na {machine_name} - {timestamp_atual.strftime('%d/%m/%Y %H:%M:%S')}"
-            worksheet.append_row([novo_registro])
+def copia_vencida(cache):
+    try:
+        baixado_em = datetime.fromisoformat(cache['baixado_em'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return datetime.now() - baixado_em > timedelta(hours=ROSTER_MAX_AGE_HOURS)
+
+def baixar_contas(spreadsheet):
+# Lê a versão da lista de contas e depois as colunas da lista (nessa ordem, para que uma
+# mudança feita entre as duas leituras seja vista na próxima conferência).
+    versao_contas = ler_versao_contas(spreadsheet)
+    return versao_contas, ler_colunas(spreadsheet, spreadsheet.sheet1, ROSTER_COLUMNS)
+
+def senha_do_usuario(user):
+# Usada quando a senha ainda não está na memória (a conferência em segundo plano não
+# terminou ou falhou). Lê a senha do aluno na planilha, na linha dele da lista de contas (o 'id'), em uma
+# única requisição com o cabeçalho. Se a linha não for mais a do aluno (a lista mudou
+# desde a cópia local), procura o email nas colunas da lista.
+    spreadsheet = abrir_planilha()
+    sheet = spreadsheet.sheet1
+    resposta = spreadsheet.values_batch_get(
+        [absolute_range_name(sheet.title, '1:1'), absolute_range_name(sheet.title, f"{user['id']}:{user['id']}")]
+    )
+    cabecalho, linha = [(faixa.get('values') or [[]])[0] for faixa in resposta.get('valueRanges', [])]
+    dados = dict(zip(cabecalho, linha))
+    if dados.get('email') == user['email'] and 'senha' in dados:
+        return dados['senha']
+    colunas = ler_colunas(spreadsheet, sheet, ['email', 'senha'])
+    for email, senha in zip(colunas.get('email', []), colunas.get('senha', [])):
+        if email == user['email']:
+            return senha
+    raise ValueError(f"A conta {user['email']} não está mais na lista de contas.")
+
+def buscar_senha(user):
+# Busca a senha em segundo plano e retorna um Future, para que o navegador abra enquanto isso.
+    futuro = Future()
+    def buscar():
+        try:
+            futuro.set_result(senha_do_usuario(user))
+        except Exception as e:
+            futuro.set_exception(e)
+    threading.Thread(target=buscar, daemon=True).start()
+    return futuro
+
+def preparar_planilha(spreadsheet):
+# Garante que as worksheets de log, máquinas, acessos e a versão da lista de contas existam
+# (uma única consulta aos metadados)
+    existentes = preparar_abas_registro(spreadsheet)
+    if ROSTER_VERSION_WORKSHEET_NAME not in existentes:
+        ws = spreadsheet.add_worksheet(title=ROSTER_VERSION_WORKSHEET_NAME, rows="2", cols="1")
+        ws.append_rows([["Versão da lista de contas"], ["1"]])
+
+def aplicar_contas(usuarios):
+# Troca a lista de usuários e refaz a lista de nomes e a liberação do login para a turma
+# agendada (chamada na thread da interface).
+    definir_usuarios(usuarios)
+    if root is not None and name_list is not None:
+        aplicar_horario()
+
+def sincronizar_planilha(cache):
+# Em segundo plano, depois que a janela abre: prepara as abas e confere a versão da lista
+# de contas (uma célula). A lista só é baixada se a versão mudou desde a cópia local ou se
+# a cópia tem mais de ROSTER_MAX_AGE_HOURS (para o caso de a versão não ter sido
+# aumentada), e a interface só é atualizada se as contas forem diferentes das da cópia.
+# Sem mudança, só as colunas de email e senha são lidas, para guardar as senhas.
+# O modifiedTime do Drive não serve: as abas de registro ficam na mesma planilha, então
+# ele muda a cada login.
+    try:
+        try:
+            spreadsheet = abrir_planilha()
+            preparar_planilha(spreadsheet)
+        finally:
+            planilha_preparada.set()
+        if cache is None:
             return
-
-        partes = ultimo_registro_da_maquina.split(' - ')
-        timestamp_anterior_str = partes[-1]
-        nome_anterior = partes[0].split(' acessou na ')[0]
-        
-        timestamp_anterior = datetime.strptime(timestamp_anterior_str, '%d/%m/%Y %H:%M:%S')
-
-        if user_data['nome'] != nome_anterior:
-            print(f"Novo usuário ({user_data['nome']}) na máquina {machine_name}. Registrando acesso.")
-            novo_registro = f"{user_data['nome']} acessou na {machine_name} - {timestamp_atual.strftime('%d/%m/%Y %H:%M:%S')}"
-            worksheet.append_row([novo_registro])
+        versao_contas = ler_versao_contas(spreadsheet)
+        if versao_contas == cache.get('versao_contas') and not copia_vencida(cache):
+            guardar_senhas(ler_colunas(spreadsheet, spreadsheet.sheet1, ['email', 'senha']))
             return
-            
-        diferenca_tempo = timestamp_atual - timestamp_anterior
-        
-        if diferenca_tempo > timedelta(hours=2):
-            print(f"Mesmo usuário ({user_data['nome']}) após 2h. Registrando novo acesso.")
-            novo_registro = f"{user_data['nome']} acessou na {machine_name} - {timestamp_atual.strftime('%d/%m/%Y %H:%M:%S')}"
-            worksheet.append_row([novo_registro])
+        colunas = ler_colunas(spreadsheet, spreadsheet.sheet1, ROSTER_COLUMNS)
+        if not colunas or not colunas['full_name']:
             return
-
-        print(f"Acesso repetido de {user_data['nome']} em menos de 2h. Não registrando.")
-
+        guardar_senhas(colunas)
+        gravar_cache_contas(versao_contas, colunas)
+        if sem_senhas(colunas) != cache['colunas']:
+            usuarios = montar_usuarios(colunas)
+            if root is not None:
+                root.after(0, aplicar_contas, usuarios)
+            else:
+                aplicar_contas(usuarios)
     except Exception as e:
-        print(f"ERRO AO PROCESSAR ACESSO FILTRADO: {e}")
+        print(f"Não foi possível atualizar a lista de contas: {e}")
 
+def aguardar_preparacao():
+# Espera a preparação da planilha em segundo plano (as abas de log precisam existir).
+    if sync_thread is not None:
+        planilha_preparada.wait()
 
-def register_log(user_data):
-# Registra o acesso de um usuário, traduzindo o nome da máquina usando a aba 'Maquinas'.
-    try:
-        print("Iniciando registro de log...")
-        hostname = socket.gethostname()
-        machine_name_to_log = hostname
-        
-        spreadsheet = gspread_spreadsheet
-        
+def load_data():
+# Carrega a lista de contas da cópia local, sem esperar pela rede, e a confere em segundo
+# plano. Sem cópia local (primeira execução), baixa a lista antes de abrir a janela.
+    global sync_thread
+    definir_usuarios([])
+    cache = ler_cache_contas()
+    if cache is None:
         try:
-            worksheet_machines = spreadsheet.worksheet(MACHINES_WORKSHEET_NAME)
-            machine_list = worksheet_machines.get_all_records()
-            machine_map = {item["Hostname"]: item["Apelido"] for item in machine_list}
-            machine_name_to_log = machine_map.get(hostname, hostname)
-        except Exception as e:
-            print(f"Erro ao ler a aba de máquinas: {e}. Usando hostname real.")
-
-        agora = datetime.now()
-        data_atual = agora.strftime("%d/%m/%Y")
-        hora_atual = agora.strftime("%H:%M:%S")
-
-        processar_acesso_filtrado(spreadsheet, user_data, machine_name_to_log, agora)
-        
-        log_row = [
-            data_atual, 
-            hora_atual, 
-            user_data['nome'], 
-            user_data['email'], 
-            user_data['escola'], 
-            machine_name_to_log
-        ]                    
+            versao_contas, colunas = baixar_contas(abrir_planilha())
+            
+            if not colunas or not colunas['full_name']:
+                messagebox.showerror("Erro", "A planilha está vazia ou não pôde ser lida.")
+                sys.exit(1)
 
-        worksheet_logs = spreadsheet.worksheet(LOG_WORKSHEET_NAME)
+            gravar_cache_contas(versao_contas, colunas)
+            guardar_senhas(colunas)
+            definir_usuarios(montar_usuarios(colunas))
 
-        
-        worksheet_logs.append_row(log_row)
-        print(f"Log registrado com sucesso para: {user_data['nome']} na máquina '{machine_name_to_log}'")
+        except FileNotFoundError:
+            messagebox.showerror( "Erro de Autenticação", f"Arquivo de credenciais '{CREDENTIALS_PATH}' não encontrado.")
+            sys.exit(1)
+        except gspread.exceptions.SpreadsheetNotFound:
+            messagebox.showerror("Erro de Acesso", f"Planilha '{SPREADSHEET_NAME}' não encontrada.")
+            sys.exit(1)
+        except Exception as e:
+            messagebox.showerror("Erro Inesperado", f"Ocorreu um erro ao carregar os dados:\n{e}")
+            sys.exit(1)
+    else:
+        definir_usuarios(montar_usuarios(cache['colunas']))
+    sync_thread = threading.Thread(target=sincronizar_planilha, args=(cache,), daemon=True)
+    sync_thread.start()
+
+def aplicar_horario():
+# Preenche e desabilita os menus com a turma do CRONOGRAMA para agora e mostra os nomes
+# dela. O login só fica liberado dentro do horário de aula e se a turma agendada estiver na
+# lista de contas; refeito quando a lista de contas é atualizada em segundo plano.
+    turma_permitida = verificar_horario_atual()
+    school_menu.config(state="disabled")
+    period_menu.config(state="disabled")
+    series_menu.config(state="disabled")
+    class_warning.pack_forget()
 
-    except Exception as e:
-        print(f"ERRO GERAL AO REGISTRAR O LOG: {e}")
+    # Se estiver dentro de um horário de aula permitido
+    if turma_permitida:
+        escola_permitida = turma_permitida['escola']
+        serie_permitida = turma_permitida['serie']
+        turma_agendada = turma_permitida['turma']
 
-def load_data():
-    global ALL_USERS
-    ALL_USERS = []
-    try:
-        global gspread_creds, gspread_client, gspread_spreadsheet
-        if gspread_client is None:
-            gspread_creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_PATH, SCOPE)
-            gspread_client = gspread.authorize(gspread_creds)
-        if gspread_spreadsheet is None:
-            gspread_spreadsheet = gspread_client.open(SPREADSHEET_NAME)
-        sheet = gspread_spreadsheet.sheet1
-        sheet_data = sheet.get_all_records()
-        
-        if not sheet_data:
-            messagebox.showerror("Erro", "A planilha está vazia ou não pôde ser lida.")
-            sys.exit(1)
+        var_school.set(escola_permitida)
+        var_period.set(turma_agendada)
+        var_series.set(serie_permitida)
+        update_options()
 
-        for row in sheet_data:
-            new_row = {
-                'nome': row['full_name'], 'email': row['email'], 'senha': row['senha'],
-                'escola': str(row['descescola']).strip(),
-            }
-            column_name = str(row.get('name', '')).strip()
-            if ' - ' in column_name:
-                parts = column_name.split(' - ', 1)
-                new_row['serie'] = parts[0].strip()
-                new_row['periodo'] = parts[1].strip()
-            else:
-                new_row['serie'] = column_name; new_row['periodo'] = ''
-            ALL_USERS.append(new_row)
+        # Verifica se a lista de nomes está vazia após a atualização
+        if name_list.size() == 0:
+            full_turma_name = f"{serie_permitida} - {turma_agendada} - {escola_permitida}"
+            class_warning.config(text=f"Turma agendada ({full_turma_name}) não encontrada na planilha.")
+            class_warning.pack(pady=5)
+            login_btn.config(state="disabled")
+        else:
+            login_btn.config(state="normal")
 
-    except FileNotFoundError:
-        messagebox.showerror( "Erro de Autenticação", f"Arquivo de credenciais '{CREDENTIALS_PATH}' não encontrado.")
-        sys.exit(1)
-    except gspread.exceptions.SpreadsheetNotFound:
-        messagebox.showerror("Erro de Acesso", f"Planilha '{SPREADSHEET_NAME}' não encontrada.")
-        sys.exit(1)
-    except Exception as e:
-        messagebox.showerror("Erro Inesperado", f"Ocorreu um erro ao carregar os dados:\n{e}")
-        sys.exit(1)
+    else:
+        var_school.set("Fora do horário de aula")
+        var_period.set("Nenhum login permitido")
+        var_series.set("Tente novamente mais tarde")
+        update_options()
+        login_btn.config(state="disabled")
 
 def update_options(*args):
+# Mostra os nomes da turma selecionada, lidos direto do índice (já ordenados).
+    global listed_users
     school_selected = var_school.get()
     period_selected = var_period.get()
     series_selected = var_series.get()
     
+    name_list.delete(0, 'end')
+    listed_users = []
     # Condição alterada para lidar com os valores pré-selecionados
     if (school_selected != "Selecione a Escola" and period_selected and series_selected != "Selecione a Série"):
-        filtered_users = [
-            user for user in ALL_USERS
-            if user['escola'] == school_selected and user['periodo'] == period_selected and user['serie'] == series_selected
-        ]
-        name_list.delete(0, 'end')
-        for user in sorted(filtered_users, key=lambda u: u['nome']):
-            name_list.insert('end', user['nome'])
-    else:
-        name_list.delete(0, 'end')
+        rotulos, listed_users = USERS_BY_CLASS.get((school_selected, period_selected, series_selected), ([], []))
+        if rotulos:
+            name_list.insert('end', *rotulos)
 
 def start_login():
     try:
-        selected_name = name_list.get(name_list.curselection())
-        user = next(u for u in ALL_USERS if u['nome'] == selected_name)
+        # A posição selecionada identifica o aluno, mesmo que outro tenha o mesmo nome
+        user = listed_users[name_list.curselection()[0]]
         
-        register_log(user)
+        registrar_acesso(user)
         
         email = user['email']
-        password = user['senha']
+        password = PASSWORDS.get(user['email']) or buscar_senha(user)
         
         root.destroy()
         driver = perform_login(email, password)
@@ -309,35 +614,10 @@ def manage_session(driver):
     sys.exit(0)
 
 def start_application():
-    global root, var_school, var_period, var_series, name_list, gspread_client, gspread_spreadsheet
+    global root, var_school, var_period, var_series, name_list
+    global school_menu, period_menu, series_menu, login_btn, class_warning
     load_data()
-
-    # Inicializa gspread client e spreadsheet se ainda não estiverem inicializados
-    if gspread_client is None:
-        gspread_creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_PATH, SCOPE)
-        gspread_client = gspread.authorize(gspread_creds)
-    if gspread_spreadsheet is None:
-        gspread_spreadsheet = gspread_client.open(SPREADSHEET_NAME)
-
-    # Garante que as worksheets de log e máquinas existam
-    try:
-        gspread_spreadsheet.worksheet(LOG_WORKSHEET_NAME)
-    except gspread.exceptions.WorksheetNotFound:
-        ws = gspread_spreadsheet.add_worksheet(title=LOG_WORKSHEET_NAME, rows="1000", cols="10")
-        ws.append_row(["Data", "Hora", "Nome Aluno", "Email", "Escola", "Nome da Máquina"])
-    
-    try:
-        gspread_spreadsheet.worksheet(MACHINES_WORKSHEET_NAME)
-    except gspread.exceptions.WorksheetNotFound:
-        # Cria a worksheet de máquinas se não existir, sem cabeçalho inicial
-        gspread_spreadsheet.add_worksheet(title=MACHINES_WORKSHEET_NAME, rows="1000", cols="2")
-
-    try:
-        gspread_spreadsheet.worksheet("acessos_filtrados")
-    except gspread.exceptions.WorksheetNotFound:
-        ws = gspread_spreadsheet.add_worksheet(title="acessos_filtrados", rows="1000", cols="1")
-        ws.append_row(["Registro de Acesso Significativo"])
-
+    iniciar_registros()
     
     root = Tk()
     root.title("Automatizador de Login")
@@ -366,8 +646,6 @@ def start_application():
     button_bg = "#7B61FF"
     button_fg = "white"
 
-    turma_permitida = verificar_horario_atual()
-
     # Criação das variáveis e menus
     var_school = StringVar(root)
     var_period = StringVar(root) #'period' está sendo usado para a 'turma' (A, B...)
@@ -400,39 +678,8 @@ def start_application():
                        bg=button_bg, fg=button_fg, relief="flat", pady=10)
     login_btn.pack(pady=10, fill='x')
 
-    # Se estiver dentro de um horário de aula permitido
-    if turma_permitida:
-        escola_permitida = turma_permitida['escola']
-        serie_permitida = turma_permitida['serie']
-        turma_agendada = turma_permitida['turma'] 
-
-        # Preenche e desabilita os menus diretamente com os dados do cronograma
-        var_school.set(escola_permitida)
-        var_period.set(turma_agendada) 
-        var_series.set(serie_permitida)
-        
-        school_menu.config(state="disabled")
-        period_menu.config(state="disabled")
-        series_menu.config(state="disabled")
-
-        update_options()
-
-        # Verifica se a lista de nomes está vazia após a atualização
-        if name_list.size() == 0:
-            full_turma_name = f"{serie_permitida} - {turma_agendada} - {escola_permitida}"
-            Label(main_frame, text=f"Turma agendada ({full_turma_name}) não encontrada na planilha.",
-                  bg=bg_color, fg="orange", font=label_font).pack(pady=5)
-            login_btn.config(state="disabled")
-
-    else:
-        var_school.set("Fora do horário de aula")
-        var_period.set("Nenhum login permitido")
-        var_series.set("Tente novamente mais tarde")
-
-        school_menu.config(state="disabled")
-        period_menu.config(state="disabled")
-        series_menu.config(state="disabled")
-        login_btn.config(state="disabled")
+    class_warning = Label(main_frame, text="", bg=bg_color, fg="orange", font=label_font)
+    aplicar_horario()
 
     footer_text = "Desenvolvido por Alan Mathias | Para mais informações: alanmathiasctt@gmail.com"
     footer_label = Label(main_frame, text=footer_text, font=("Segoe UI", 8), bg=bg_color, fg="#A0A0A0")
@@ -441,4 +688,7 @@ def start_application():
     root.mainloop()
 
 if __name__ == "__main__":
-    start_application()
\ No newline at end of file
+    try:
+        start_application()
+    finally:
+        finalizar_registros()
\ No newline at end of file
@@ -0,0 +1,73 @@
+# Diário local dos acessos registrados pelo aplicativo do aluno.
+#
+# Cada login é gravado aqui (com fsync) antes de qualquer requisição à planilha, então
+# um acesso não se perde se a rede ou a cota do Google Sheets falharem: ele continua
+# pendente até ser enviado, mesmo que o aplicativo seja fechado. O arquivo só recebe
+# linhas no fim (JSON Lines), de dois tipos:
+#   {"tipo": "acesso", "id": "...", ...}   um login; o id é a chave de idempotência
+#   {"tipo": "enviado", "ids": [...]}      logins já gravados na planilha
+# Quando não resta nenhum pendente, o arquivo é esvaziado.
+import os
+import json
+import uuid
+import threading
+
+
+class DiarioAcessos:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._pendentes = {}  # id -> acesso, na ordem em que foram gravados
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, 'rb') as f:
+                conteudo = f.read()
+        except FileNotFoundError:
+            return
+        # Uma gravação interrompida pode deixar a última linha pela metade; ela é descartada
+        # para que o próximo acesso não seja anexado a ela
+        completo = conteudo[:conteudo.rfind(b'\n') + 1]
+        if len(completo) != len(conteudo):
+            with open(self.caminho, 'r+b') as f:
+                f.truncate(len(completo))
+        for linha in completo.decode('utf-8', errors='replace').splitlines():
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                continue
+            if registro.get('tipo') == 'acesso':
+                self._pendentes[registro['id']] = registro
+            elif registro.get('tipo') == 'enviado':
+                for id_acesso in registro.get('ids', []):
+                    self._pendentes.pop(id_acesso, None)
+
+    def _anexar(self, registro):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Grava um acesso (`dados` com os campos do login) e retorna o registro com o id
+    def registrar(self, dados):
+        acesso = {'tipo': 'acesso', 'id': uuid.uuid4().hex, **dados}
+        with self._lock:
+            self._anexar(acesso)
+            self._pendentes[acesso['id']] = acesso
+        return acesso
+
+    # Os acessos ainda não enviados, do mais antigo ao mais recente (no máximo `limite`)
+    def pendentes(self, limite=None):
+        with self._lock:
+            return list(self._pendentes.values())[:limite]
+
+    def confirmar(self, ids):
+        with self._lock:
+            for id_acesso in ids:
+                self._pendentes.pop(id_acesso, None)
+            if self._pendentes:
+                self._anexar({'tipo': 'enviado', 'ids': list(ids)})
+            else:
+                with open(self.caminho, 'w', encoding='utf-8'):
+                    pass
@@ -0,0 +1,292 @@
+# Registro dos acessos na planilha: as linhas das abas 'Logs' e 'acessos_filtrados' e a
+# linha da máquina na aba 'ultimo_acesso'.
+#
+# Não depende da interface (Tk, Selenium) nem do cronograma: o aplicativo do aluno usa
+# um RegistroAcessos na thread de registro, e o teste de carga do dashboard
+# (dashboard_adm/teste_carga.py) usa um por quiosque simulado, com as mesmas requisições.
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from gspread.utils import a1_range_to_grid_range, absolute_range_name, rowcol_to_a1
+
+LOG_WORKSHEET_NAME = "Logs"
+LOG_COLUMNS = ["Data", "Hora", "Nome Aluno", "Email", "Escola", "Nome da Máquina"]
+MACHINES_WORKSHEET_NAME = "Maquinas"
+FILTERED_WORKSHEET_NAME = "acessos_filtrados"
+FILTERED_COLUMNS = ["Registro de Acesso Significativo"]
+# Último acesso significativo de cada máquina (uma linha por máquina)
+LAST_ACCESS_WORKSHEET_NAME = "ultimo_acesso"
+LAST_ACCESS_COLUMNS = ["Máquina", "Nome Aluno", "Email", "Horário"]
+LAST_ACCESS_VERSION = 1
+LOG_ID_COLUMN = "ID Registro"
+LOG_TIME_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+def preparar_abas_registro(spreadsheet):
+# Garante que as abas de registro existam (uma única consulta aos metadados). Retorna os
+# títulos das abas que já existiam.
+    existentes = {ws.title for ws in spreadsheet.worksheets()}
+    if LOG_WORKSHEET_NAME not in existentes:
+        ws = spreadsheet.add_worksheet(title=LOG_WORKSHEET_NAME, rows="1000", cols="10")
+        ws.append_row(LOG_COLUMNS + [LOG_ID_COLUMN])
+
+    if MACHINES_WORKSHEET_NAME not in existentes:
+        # Cria a worksheet de máquinas se não existir, sem cabeçalho inicial
+        spreadsheet.add_worksheet(title=MACHINES_WORKSHEET_NAME, rows="1000", cols="2")
+
+    if FILTERED_WORKSHEET_NAME not in existentes:
+        ws = spreadsheet.add_worksheet(title=FILTERED_WORKSHEET_NAME, rows="1000", cols="2")
+        ws.append_row(FILTERED_COLUMNS + [LOG_ID_COLUMN])
+
+    if LAST_ACCESS_WORKSHEET_NAME not in existentes:
+        ws = spreadsheet.add_worksheet(title=LAST_ACCESS_WORKSHEET_NAME, rows="100", cols=str(len(LAST_ACCESS_COLUMNS)))
+        ws.append_row(LAST_ACCESS_COLUMNS)
+    return existentes
+
+def ler_abas(spreadsheet, titulos):
+# Lê várias abas inteiras em uma única requisição (values_batch_get) e retorna {titulo: linhas}.
+    resposta = spreadsheet.values_batch_get([absolute_range_name(titulo) for titulo in titulos])
+    faixas = resposta.get('valueRanges', [])
+    return {titulo: faixa.get('values', []) for titulo, faixa in zip(titulos, faixas)}
+
+def anexar_linhas(spreadsheet, linhas_por_aba):
+# Acrescenta as linhas de cada aba ({titulo: linhas}) com uma requisição por aba (como o
+# append_rows do gspread); as requisições são independentes e vão em paralelo.
+    def anexar(titulo, linhas):
+        spreadsheet.values_append(
+            absolute_range_name(titulo), params={'valueInputOption': 'RAW'}, body={'values': linhas}
+        )
+    with ThreadPoolExecutor(max_workers=len(linhas_por_aba) or 1) as executor:
+        futuros = [executor.submit(anexar, titulo, linhas) for titulo, linhas in linhas_por_aba.items()]
+        for futuro in futuros:
+            futuro.result()
+
+def texto_acesso_filtrado(nome, machine_name, horario):
+    return f"{nome} acessou na {machine_name} - {horario.strftime(LOG_TIME_FORMAT)}"
+
+def processar_acesso_filtrado(ultimo, user_data, machine_name, timestamp_atual):
+# Decide, a partir do último acesso significativo da máquina (`ultimo`, ou None se ela
+# ainda não tem nenhum), se o acesso deve ser registrado em 'acessos_filtrados'.
+# Retorna o texto do novo registro, ou None se for um acesso repetido.
+    try:
+        if ultimo is None:
+            print(f"Primeiro acesso registrado para a máquina {machine_name}.")
+            return texto_acesso_filtrado(user_data['nome'], machine_name, timestamp_atual)
+
+        # O email identifica o aluno mesmo quando há nomes repetidos
+        if user_data['email'] != ultimo['email']:
+            print(f"Novo usuário ({user_data['nome']}) na máquina {machine_name}. Registrando acesso.")
+            return texto_acesso_filtrado(user_data['nome'], machine_name, timestamp_atual)
+
+        diferenca_tempo = timestamp_atual - datetime.strptime(ultimo['horario'], LOG_TIME_FORMAT)
+
+        if diferenca_tempo > timedelta(hours=2):
+            print(f"Mesmo usuário ({user_data['nome']}) após 2h. Registrando novo acesso.")
+            return texto_acesso_filtrado(user_data['nome'], machine_name, timestamp_atual)
+
+        print(f"Acesso repetido de {user_data['nome']} em menos de 2h. Não registrando.")
+
+    except Exception as e:
+        print(f"ERRO AO PROCESSAR ACESSO FILTRADO: {e}")
+    return None
+
+def buscar_ultimo_acesso(spreadsheet, machine_name):
+# Procura a máquina na aba 'ultimo_acesso' quando ela não está na cópia local (primeiro
+# acesso neste quiosque, ou cópia apagada). A aba tem uma linha por máquina, então a
+# leitura não cresce com o histórico. Retorna None se a máquina não estiver lá.
+    valores = spreadsheet.values_get(absolute_range_name(LAST_ACCESS_WORKSHEET_NAME)).get('values', [])
+    encontrado = None
+    for numero, linha in enumerate(valores[1:], start=2):
+        linha = linha + [''] * (len(LAST_ACCESS_COLUMNS) - len(linha))
+        if linha[0] == machine_name:
+            encontrado = {'nome': linha[1], 'email': linha[2], 'horario': linha[3], 'linha': numero}
+    return encontrado
+
+def gravar_ultimo_acesso(spreadsheet, machine_name, ultimo):
+# Grava o último acesso da máquina na sua linha da aba 'ultimo_acesso'; uma máquina nova
+# ganha uma linha no fim. Como a aba pode ter sido ordenada ou editada, a coluna A da
+# linha guardada é conferida antes (uma célula) e só as colunas de dados são regravadas;
+# se a linha não for mais da máquina, ela é procurada de novo. Retorna o número da linha.
+    dados = [ultimo['nome'], ultimo['email'], ultimo['horario']]
+    linha = ultimo.get('linha')
+    if linha:
+        atual = (spreadsheet.values_get(absolute_range_name(LAST_ACCESS_WORKSHEET_NAME, f"A{linha}")).get('values') or [[]])[0]
+        if atual[:1] != [machine_name]:
+            encontrado = buscar_ultimo_acesso(spreadsheet, machine_name)
+            linha = encontrado['linha'] if encontrado else None
+    if linha:
+        spreadsheet.values_update(
+            absolute_range_name(LAST_ACCESS_WORKSHEET_NAME, f"B{linha}"),
+            params={'valueInputOption': 'RAW'}, body={'values': [dados]},
+        )
+        return linha
+    resposta = spreadsheet.values_append(
+        absolute_range_name(LAST_ACCESS_WORKSHEET_NAME), params={'valueInputOption': 'RAW'},
+        body={'values': [[machine_name] + dados]},
+    )
+    faixa = resposta.get('updates', {}).get('updatedRange', '')
+    return a1_range_to_grid_range(faixa.rsplit('!', 1)[-1])['startRowIndex'] + 1 if '!' in faixa else None
+
+def ids_registrados(spreadsheet, colunas):
+# Ids dos acessos que já estão em cada aba ({titulo: ids}), lendo só as colunas de ids em
+# uma única requisição.
+    faixas = []
+    for titulo, coluna in colunas.items():
+        letra = rowcol_to_a1(1, coluna + 1)[:-1]
+        faixas.append(absolute_range_name(titulo, f"{letra}2:{letra}"))
+    resposta = spreadsheet.values_batch_get(faixas)
+    return {
+        titulo: {linha[0] for linha in faixa.get('values', []) if linha}
+        for titulo, faixa in zip(colunas, resposta.get('valueRanges', []))
+    }
+
+def com_id(linha, coluna, id_acesso):
+    return linha + [''] * (coluna - len(linha)) + [id_acesso]
+
+
+# Estado de um quiosque para o registro dos acessos: a posição da coluna de ids em cada
+# aba de registros, lida uma vez, e o último acesso de cada máquina. Com
+# `caminho_ultimo_acesso`, os últimos acessos são guardados nesse arquivo (identificado
+# por `origem`, a planilha de onde vieram); sem ele, ficam só em memória.
+class RegistroAcessos:
+    def __init__(self, caminho_ultimo_acesso=None, origem=None):
+        self.caminho_ultimo_acesso = caminho_ultimo_acesso
+        self.origem = origem
+        self.colunas_id = None
+        self.ultimos = None
+
+    def ler_ultimos_acessos(self):
+    # Retorna a cópia local da aba 'ultimo_acesso' ({máquina: {'nome', 'email', 'horario',
+    # 'linha'}}), vazia se ela não existir, estiver ilegível ou for de outra planilha.
+        if self.caminho_ultimo_acesso is None:
+            return {}
+        try:
+            with open(self.caminho_ultimo_acesso, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if cache.get('versao') != LAST_ACCESS_VERSION or cache.get('origem') != self.origem:
+            return {}
+        return cache.get('maquinas', {})
+
+    def gravar_ultimos_acessos(self):
+    # Grava a cópia local em um arquivo temporário e o substitui de uma vez.
+        if self.caminho_ultimo_acesso is None:
+            return
+        cache = {'versao': LAST_ACCESS_VERSION, 'origem': self.origem, 'maquinas': self.ultimos}
+        temporario = self.caminho_ultimo_acesso + '.tmp'
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho_ultimo_acesso)
+        except OSError as e:
+            print(f"Não foi possível gravar a cópia local do último acesso: {e}")
+
+    def obter_ultimos_acessos(self):
+        if self.ultimos is None:
+            self.ultimos = self.ler_ultimos_acessos()
+        return self.ultimos
+
+    def colunas_id_registro(self, spreadsheet):
+    # Posição (a partir de 0) da coluna de ids nas abas de logs e de acessos filtrados, lida
+    # uma vez ({titulo: posição}). Em abas criadas antes dela, o cabeçalho ganha a coluna no
+    # fim (depois das colunas que o aplicativo grava); a aba ganha antes as colunas que faltarem,
+    # já que a API recusa escrever fora da grade.
+        if self.colunas_id is None:
+            larguras = {LOG_WORKSHEET_NAME: len(LOG_COLUMNS), FILTERED_WORKSHEET_NAME: len(FILTERED_COLUMNS)}
+            resposta = spreadsheet.values_batch_get([absolute_range_name(titulo, '1:1') for titulo in larguras])
+            colunas = {}
+            for (titulo, largura), faixa in zip(larguras.items(), resposta.get('valueRanges', [])):
+                cabecalho = (faixa.get('values') or [[]])[0]
+                if LOG_ID_COLUMN not in cabecalho:
+                    posicao = max(len(cabecalho), largura)
+                    worksheet = spreadsheet.worksheet(titulo)
+                    if worksheet.col_count < posicao + 1:
+                        worksheet.add_cols(posicao + 1 - worksheet.col_count)
+                    spreadsheet.values_update(
+                        absolute_range_name(titulo, rowcol_to_a1(1, posicao + 1)),
+                        params={'valueInputOption': 'RAW'}, body={'values': [[LOG_ID_COLUMN]]},
+                    )
+                    cabecalho = cabecalho + [''] * (posicao - len(cabecalho)) + [LOG_ID_COLUMN]
+                colunas[titulo] = cabecalho.index(LOG_ID_COLUMN)
+            self.colunas_id = colunas
+        return self.colunas_id
+
+    def registrar(self, spreadsheet, acessos, verificar_ids=False):
+    # Envia à planilha um lote de acessos do diário, traduzindo o nome da máquina usando a aba
+    # 'Maquinas' e um único anexo com várias linhas por aba. Se um acesso entra em
+    # 'acessos_filtrados' é decidido pelo último acesso da máquina, guardado localmente e na
+    # aba 'ultimo_acesso', onde só a linha da máquina é regravada. As linhas das duas abas
+    # levam o id do acesso; com `verificar_ids` (lote que pode já ter sido gravado, no todo
+    # ou em parte, numa tentativa que falhou sem resposta ou numa execução interrompida),
+    # cada aba só recebe os acessos cujo id ainda não está nela. Falhas de rede são
+    # propagadas para que o lote continue pendente no diário.
+        print(f"Registrando {len(acessos)} acesso(s)...")
+        abas = ler_abas(spreadsheet, [MACHINES_WORKSHEET_NAME])
+        machine_map = {}
+        try:
+            cabecalho, *linhas = abas[MACHINES_WORKSHEET_NAME] or [[]]
+            machine_list = [dict(zip(cabecalho, linha + [''] * (len(cabecalho) - len(linha)))) for linha in linhas]
+            machine_map = {item["Hostname"]: item["Apelido"] for item in machine_list}
+        except Exception as e:
+            print(f"Erro ao ler a aba de máquinas: {e}. Usando hostname real.")
+
+        colunas_id = self.colunas_id_registro(spreadsheet)
+        ja_registrados = ids_registrados(spreadsheet, colunas_id) if verificar_ids else {}
+        nos_logs = ja_registrados.get(LOG_WORKSHEET_NAME, set())
+        nos_filtrados = ja_registrados.get(FILTERED_WORKSHEET_NAME, set())
+        ultimos = self.obter_ultimos_acessos()
+        # Últimos acessos alterados neste lote; só vão para a cópia local depois de gravados
+        alterados = {}
+        novos_registros = {FILTERED_WORKSHEET_NAME: [], LOG_WORKSHEET_NAME: []}
+        for acesso in acessos:
+            user_data = acesso['usuario']
+            machine_name_to_log = machine_map.get(acesso['hostname'], acesso['hostname'])
+            agora = datetime.strptime(acesso['horario'], LOG_TIME_FORMAT)
+
+            if machine_name_to_log in alterados:
+                ultimo = alterados[machine_name_to_log]
+            elif machine_name_to_log in ultimos:
+                ultimo = ultimos[machine_name_to_log]
+            else:
+                ultimo = buscar_ultimo_acesso(spreadsheet, machine_name_to_log)
+                if ultimo is not None:
+                    ultimos[machine_name_to_log] = ultimo
+            # Se a linha filtrada já foi gravada, o acesso já é o último da máquina; senão a
+            # decisão é refeita a partir do mesmo último acesso da tentativa anterior
+            ja_filtrado = acesso['id'] in nos_filtrados
+            novo_acesso = None if ja_filtrado else processar_acesso_filtrado(ultimo, user_data, machine_name_to_log, agora)
+            if novo_acesso:
+                novos_registros[FILTERED_WORKSHEET_NAME].append(
+                    com_id([novo_acesso], colunas_id[FILTERED_WORKSHEET_NAME], acesso['id'])
+                )
+            if novo_acesso or ja_filtrado:
+                alterados[machine_name_to_log] = {
+                    'nome': user_data['nome'], 'email': user_data['email'], 'horario': acesso['horario'],
+                    'linha': ultimo['linha'] if ultimo else None,
+                }
+
+            if acesso['id'] in nos_logs:
+                print(f"Acesso de {user_data['nome']} ({acesso['horario']}) já estava na planilha.")
+                continue
+            log_row = [
+                agora.strftime("%d/%m/%Y"),
+                agora.strftime("%H:%M:%S"),
+                user_data['nome'],
+                user_data['email'],
+                user_data['escola'],
+                machine_name_to_log
+            ]
+            novos_registros[LOG_WORKSHEET_NAME].append(com_id(log_row, colunas_id[LOG_WORKSHEET_NAME], acesso['id']))
+
+        anexar_linhas(spreadsheet, {titulo: linhas for titulo, linhas in novos_registros.items() if linhas})
+        # Os registros já estão na planilha: a cópia local é atualizada mesmo que a linha da
+        # aba 'ultimo_acesso' não possa ser gravada agora
+        try:
+            for machine_name, ultimo in alterados.items():
+                ultimo['linha'] = gravar_ultimo_acesso(spreadsheet, machine_name, ultimo)
+        finally:
+            if alterados:
+                ultimos.update(alterados)
+                self.gravar_ultimos_acessos()
+        print(f"{len(novos_registros[LOG_WORKSHEET_NAME])} acesso(s) registrado(s) na planilha.")
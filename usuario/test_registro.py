@@ -0,0 +1,49 @@
+# As abas antigas foram criadas com poucas colunas (a 'acessos_filtrados' com uma só); a
+# planilha local recusa escrever fora da grade, como a API, e o registro precisa ampliá-las.
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "compartilhado"))
+
+from planilha_local import PlanilhaMemoria
+from registro import (
+    RegistroAcessos, preparar_abas_registro, LOG_WORKSHEET_NAME, LOG_COLUMNS, FILTERED_WORKSHEET_NAME,
+    FILTERED_COLUMNS, LOG_ID_COLUMN,
+)
+
+
+def planilha_antiga():
+    planilha = PlanilhaMemoria()
+    planilha.add_worksheet(title=LOG_WORKSHEET_NAME, rows="1000", cols=str(len(LOG_COLUMNS))).append_row(LOG_COLUMNS)
+    planilha.add_worksheet(title=FILTERED_WORKSHEET_NAME, rows="1000", cols="1").append_row(FILTERED_COLUMNS)
+    preparar_abas_registro(planilha)
+    return planilha
+
+
+def acesso(id_acesso):
+    return {
+        "id": id_acesso,
+        "usuario": {"nome": "Ana", "email": "ana@escola.pr.gov.br", "escola": "ESCOLA MUNICIPAL 1"},
+        "hostname": "PC-01",
+        "horario": "01/03/2024 10:00:00",
+    }
+
+
+def test_escrita_fora_da_grade_e_recusada():
+    planilha = planilha_antiga()
+    with pytest.raises(ValueError, match="exceeds grid limits"):
+        planilha.worksheet(FILTERED_WORKSHEET_NAME).update([[LOG_ID_COLUMN]], "B1")
+
+
+def test_registro_amplia_abas_antigas(tmp_path):
+    planilha = planilha_antiga()
+    RegistroAcessos(str(tmp_path / "ultimo_acesso.json")).registrar(planilha, [acesso("id1")])
+
+    filtrados = planilha.worksheet(FILTERED_WORKSHEET_NAME)
+    assert filtrados.col_count == 2
+    assert filtrados.row_values(1) == FILTERED_COLUMNS + [LOG_ID_COLUMN]
+    assert filtrados.row_values(2)[1] == "id1"
+    logs = planilha.worksheet(LOG_WORKSHEET_NAME)
+    assert logs.row_values(1) == LOG_COLUMNS + [LOG_ID_COLUMN]
+    assert logs.row_values(2)[-1] == "id1"